@@ -1,70 +1,152 @@
-from flask import Flask, render_template, jsonify, request
-from models import Counter, get_session, init_db
+import time
+
+startup_started = time.perf_counter()
+
+from flask import Flask, Response, render_template, jsonify, request
+from sqlalchemy import event
+from models import COUNTER_SHARDS, Session, create_probe_engine, get_counter_value, get_session, get_pool_stats, increment_counter, init_db, remove_session
+from counter import create_increment_buffer, start_counter_compactor
+from cache import create_counter_cache
+from events import create_counter_events
+from health import create_readiness_probe
 import os
 
 app = Flask(__name__)
 
-init_db()
+counter_cache = create_counter_cache()
+counter_events = create_counter_events()
+if counter_cache.backend == 'local':
+    counter_events.follow(counter_cache)
+
+def record_count(session, value):
+    if COUNTER_SHARDS > 1:
+        # The value is a single shard's; readers sum the shards through the cache instead.
+        return
+    counter_events.record(session, value)
+    session.info['counter_value'] = value
+
+@event.listens_for(Session, 'after_commit')
+def publish_count(session):
+    value = session.info.pop('counter_value', None)
+    if value is not None:
+        counter_cache.set(value)
+        counter_events.committed(value)
+
+increment_buffer = create_increment_buffer(on_flush=record_count)
+counter_compactor = start_counter_compactor()
+readiness_probe = create_readiness_probe(create_probe_engine())
+
+@app.cli.command('init-db')
+def init_db_command():
+    started = time.perf_counter()
+    created = init_db()
+    print(f"Database schema ready in {(time.perf_counter() - started) * 1000:.1f} ms (created {len(created)} counter rows)")
+
+@app.teardown_appcontext
+def shutdown_session(exception=None):
+    remove_session()
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+@app.route('/livez')
+def livez():
+    return jsonify({'status': 'alive', 'startup_ms': startup_ms}), 200
+
+@app.route('/readyz')
+def readyz():
+    probe = readiness_probe.status()
+    return jsonify(probe), 200 if probe['ready'] else 503
+
 @app.route('/health')
 def health():
-    try:
-        session = get_session()
-        session.query(Counter).first()
-        session.close()
-        
+    probe = readiness_probe.status()
+    if probe['ready']:
         return jsonify({
             'status': 'healthy',
             'database': 'connected',
-            'environment': os.getenv('APP_ENV', 'development')
+            'environment': os.getenv('APP_ENV', 'development'),
+            'probe': probe,
+            'pool': get_pool_stats(),
+            'cache': counter_cache.stats(),
+            'stream': counter_events.stats()
         }), 200
-    except Exception as e:
-        return jsonify({
-            'status': 'unhealthy',
-            'database': 'disconnected',
-            'error': str(e)
-        }), 500
+    
+    return jsonify({
+        'status': 'unhealthy',
+        'database': 'disconnected',
+        'error': probe['error'],
+        'probe': probe,
+        'pool': get_pool_stats(),
+        'cache': counter_cache.stats(),
+        'stream': counter_events.stats()
+    }), 500
+
+def count_response(value, conditional=False):
+    etag = str(value)
+    if conditional and request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify({'count': value})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def read_count():
+    value = counter_cache.get()
+    if value is None:
+        value = get_counter_value(get_session())
+        counter_cache.set(value)
+        if COUNTER_SHARDS > 1:
+            counter_events.committed(value)
+    if increment_buffer:
+        value += increment_buffer.pending
+    return value
 
 @app.route('/get-count', methods=['GET'])
 def get_count():
-    session = get_session()
     try:
-        counter = session.query(Counter).first()
-        if counter:
-            value = counter.value
-        else:
-            value = 0
-        
-        return jsonify({'count': value}), 200
+        return count_response(read_count(), conditional=True)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/stream', methods=['GET'])
+def stream():
+    try:
+        value = read_count()
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
+    
+    return Response(
+        counter_events.stream(value),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def increment_response(value):
+    return count_response(value if COUNTER_SHARDS == 1 else read_count())
 
 @app.route('/increment', methods=['POST'])
 def increment():
+    if increment_buffer:
+        try:
+            return increment_response(increment_buffer.add(1))
+        except Exception as e:
+            return jsonify({'error': str(e)}), 500
+    
     session = get_session()
     try:
-        counter = session.query(Counter).first()
-        
-        if not counter:
-            counter = Counter(value=1)
-            session.add(counter)
-        else:
-            counter.value += 1
-            
+        current_value = increment_counter(session, 1)
+        record_count(session, current_value)
         session.commit()
-        current_value = counter.value
-        return jsonify({'count': current_value}), 200
+        return increment_response(current_value)
     except Exception as e:
         session.rollback()
         return jsonify({'error': str(e)}), 500
-    finally:
-        session.close()
+
+startup_ms = round((time.perf_counter() - startup_started) * 1000, 1)
 
 if __name__ == '__main__':
+    init_db()
     app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_DEBUG', '0') == '1')
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+class CounterCache:
+    backend = 'none'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self):
+        value = self._get()
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def _get(self):
+        return None
+
+    def set(self, value):
+        pass
+
+    def invalidate(self):
+        pass
+
+    def suspend(self):
+        pass
+
+    def resume(self):
+        pass
+
+class LocalCounterCache(CounterCache):
+    backend = 'local'
+
+    def __init__(self, ttl):
+        super().__init__()
+        self.ttl = ttl
+        self._value = None
+        self._expires_at = 0.0
+        self._suspended = False
+        self._lock = threading.Lock()
+
+    def stats(self):
+        stats = super().stats()
+        stats['suspended'] = self._suspended
+        return stats
+
+    def _get(self):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+            return None
+
+    def set(self, value):
+        with self._lock:
+            if not self._suspended:
+                self._value = value
+                self._expires_at = time.monotonic() + self.ttl
+
+    def invalidate(self):
+        with self._lock:
+            self._value = None
+
+    def suspend(self):
+        # While this process may miss other workers' commits, every read goes to the database.
+        with self._lock:
+            self._suspended = True
+            self._value = None
+
+    def resume(self):
+        with self._lock:
+            self._suspended = False
+
+class RedisCounterCache(CounterCache):
+    backend = 'redis'
+
+    def __init__(self, client, ttl, key='counter:value'):
+        super().__init__()
+        self.client = client
+        self.ttl_ms = max(1, int(ttl * 1000))
+        self.key = key
+
+    # The cache is an optimisation: when Redis fails, reads fall back to the database and writes
+    # are skipped, and the TTL bounds how long a value that could not be replaced stays visible.
+    def _get(self):
+        try:
+            value = self.client.get(self.key)
+        except Exception as e:
+            self._failed('read', e)
+            return None
+        return int(value) if value is not None else None
+
+    def set(self, value):
+        try:
+            self.client.set(self.key, value, px=self.ttl_ms)
+        except Exception as e:
+            self._failed('update', e)
+
+    def invalidate(self):
+        try:
+            self.client.delete(self.key)
+        except Exception as e:
+            self._failed('invalidate', e)
+
+    def _failed(self, operation, error):
+        self.errors += 1
+        print(f"Counter cache {operation} failed, using the database: {error}")
+
+def create_counter_cache():
+    ttl = float(os.getenv('COUNTER_CACHE_TTL', '1'))
+    if ttl <= 0:
+        return CounterCache()
+    
+    redis_url = os.getenv('COUNTER_CACHE_REDIS_URL')
+    if redis_url:
+        try:
+            import redis
+        except ImportError:
+            print("COUNTER_CACHE_REDIS_URL is set but the redis package is not installed, using local cache")
+        else:
+            timeout = float(os.getenv('COUNTER_CACHE_REDIS_TIMEOUT', '0.1'))
+            client = redis.Redis.from_url(redis_url, socket_timeout=timeout, socket_connect_timeout=timeout)
+            return RedisCounterCache(client, ttl)
+    
+    return LocalCounterCache(ttl)
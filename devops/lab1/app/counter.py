@@ -0,0 +1,132 @@
+import atexit
+import os
+import threading
+import time
+
+from models import compact_counter, get_counter_value, get_session, increment_counter, remove_session
+
+class IncrementBuffer:
+    def __init__(self, flush_interval_ms=100, max_pending=100, on_flush=None):
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self.pending = 0
+        self.last_value = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, amount=1):
+        # Load the stored value before queueing anything, so a failed read
+        # fails the request without leaving its increment behind.
+        if self.last_value is None:
+            self._load()
+        
+        with self._lock:
+            self.pending += amount
+            self._ensure_flusher()
+            if self.pending >= self.max_pending:
+                self._wakeup.set()
+            return self.last_value + self.pending
+
+    def _load(self):
+        with self._flush_lock:
+            if self.last_value is not None:
+                return
+            
+            session = get_session()
+            try:
+                self.last_value = get_counter_value(session)
+            finally:
+                remove_session()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                amount = self.pending
+                self.pending = 0
+            
+            if amount == 0 and self.last_value is not None:
+                return self.last_value
+            
+            session = get_session()
+            try:
+                if amount:
+                    value = increment_counter(session, amount)
+                    if self.on_flush:
+                        self.on_flush(session, value)
+                    session.commit()
+                else:
+                    value = get_counter_value(session)
+            except Exception:
+                session.rollback()
+                with self._lock:
+                    self.pending += amount
+                raise
+            finally:
+                remove_session()
+            
+            self.last_value = value
+            return value
+
+    def _ensure_flusher(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Failed to flush counter increments: {e}")
+
+def create_increment_buffer(on_flush=None):
+    if os.getenv('COUNTER_WRITE_BEHIND', '0') != '1':
+        return None
+    
+    return IncrementBuffer(
+        flush_interval_ms=int(os.getenv('COUNTER_FLUSH_INTERVAL_MS', '100')),
+        max_pending=int(os.getenv('COUNTER_FLUSH_MAX_PENDING', '100')),
+        on_flush=on_flush,
+    )
+
+class CounterCompactor:
+    def __init__(self, interval):
+        self.interval = interval
+        self._thread = threading.Thread(target=self._run, name='counter-compactor', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def compact(self):
+        session = get_session()
+        try:
+            folded = compact_counter(session)
+            session.commit()
+            return folded
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            remove_session()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Failed to compact counter shards: {e}")
+
+def start_counter_compactor():
+    interval = float(os.getenv('COUNTER_COMPACT_INTERVAL', '0'))
+    if interval <= 0:
+        return None
+    
+    return CounterCompactor(interval).start()
@@ -0,0 +1,150 @@
+import json
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import text
+
+from models import get_database_url
+
+class CounterBroadcaster:
+    def __init__(self):
+        self.value = None
+        self.version = 0
+        self.subscribers = 0
+        self._condition = threading.Condition()
+
+    def publish(self, value):
+        with self._condition:
+            if value == self.value:
+                return
+            self.value = value
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self._condition:
+            self._condition.wait_for(lambda: self.version != version, timeout)
+            return self.version, self.value
+
+    def subscribe(self, initial_value, keepalive):
+        with self._condition:
+            self.subscribers += 1
+        try:
+            version = self.version
+            value = initial_value if self.value is None else self.value
+            yield f"retry: 2000\ndata: {json.dumps({'count': value})}\n\n"
+            
+            while True:
+                new_version, new_value = self.wait(version, keepalive)
+                if new_version == version:
+                    yield ": keepalive\n\n"
+                    continue
+                version = new_version
+                yield f"data: {json.dumps({'count': new_value})}\n\n"
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+class PostgresCounterListener:
+    def __init__(self, broadcaster, channel, cache=None):
+        self.broadcaster = broadcaster
+        self.channel = channel
+        self.cache = cache
+        self._thread = threading.Thread(target=self._run, name='counter-listener', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _listen(self):
+        import psycopg2
+        
+        connection = psycopg2.connect(get_database_url())
+        connection.autocommit = True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            if self.cache is not None:
+                # Anything committed while we were not listening was missed, so start from a fresh read.
+                self.cache.invalidate()
+                self.cache.resume()
+            
+            while True:
+                if select.select([connection], [], [], 60) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notify = connection.notifies.pop(0)
+                    value = int(notify.payload)
+                    if self.cache is not None:
+                        self.cache.set(value)
+                    self.broadcaster.publish(value)
+        finally:
+            connection.close()
+
+    def _run(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as e:
+                if self.cache is not None:
+                    self.cache.suspend()
+                print(f"Counter listener disconnected: {e}")
+                time.sleep(1)
+
+class CounterEvents:
+    def __init__(self, backend='local', channel='counter_updates', keepalive=15):
+        self.backend = backend
+        self.channel = channel
+        self.keepalive = keepalive
+        self.broadcaster = CounterBroadcaster()
+        self.cache = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def follow(self, cache):
+        # A per-process cache is only correct when this worker hears every commit, including other workers'.
+        if self.backend == 'postgres':
+            cache.suspend()
+            self.cache = cache
+            self._ensure_listener()
+        elif int(os.getenv('GUNICORN_WORKERS', '1')) > 1:
+            print("COUNTER_PUSH_BACKEND=local cannot keep per-worker caches in step, "
+                  "set COUNTER_CACHE_REDIS_URL or COUNTER_PUSH_BACKEND=postgres; caching disabled")
+            cache.suspend()
+
+    def record(self, session, value):
+        if self.backend == 'postgres':
+            session.execute(
+                text('SELECT pg_notify(:channel, :payload)'),
+                {'channel': self.channel, 'payload': str(value)}
+            )
+
+    def committed(self, value):
+        if self.backend == 'local':
+            self.broadcaster.publish(value)
+
+    def stream(self, initial_value):
+        if self.backend == 'postgres':
+            self._ensure_listener()
+        return self.broadcaster.subscribe(initial_value, self.keepalive)
+
+    def stats(self):
+        return {
+            'backend': self.backend,
+            'subscribers': self.broadcaster.subscribers,
+        }
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None:
+                self._listener = PostgresCounterListener(self.broadcaster, self.channel, self.cache).start()
+
+def create_counter_events():
+    return CounterEvents(
+        backend=os.getenv('COUNTER_PUSH_BACKEND', 'local'),
+        channel=os.getenv('COUNTER_PUSH_CHANNEL', 'counter_updates'),
+        keepalive=float(os.getenv('COUNTER_STREAM_KEEPALIVE', '15')),
+    )
@@ -0,0 +1,17 @@
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('APP_INTERNAL_PORT', '5000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+# Workers inherit this, so the app knows whether other processes share the counter (events.py).
+os.environ['GUNICORN_WORKERS'] = str(workers)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '2000'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+accesslog = '-'
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+class ReadinessProbe:
+    def __init__(self, engine, interval=5):
+        self.engine = engine
+        self.interval = interval
+        self.result = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def check(self):
+        started = time.perf_counter()
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+            error = None
+        except Exception as e:
+            error = str(e)
+        
+        self.result = {
+            'ready': error is None,
+            'latency_ms': round((time.perf_counter() - started) * 1000, 2),
+            'checked_at': time.time(),
+            'error': error,
+        }
+        return self.result
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='readiness-probe', daemon=True)
+                self._thread.start()
+        return self
+
+    def status(self):
+        # Only ever reads the last result; the database is touched by the background thread alone.
+        if self.result is None:
+            return {'ready': False, 'latency_ms': None, 'age_seconds': None, 'error': 'database not checked yet'}
+        
+        result = dict(self.result)
+        result['age_seconds'] = round(time.time() - result.pop('checked_at'), 3)
+        if result['error'] is None:
+            result.pop('error')
+        return result
+
+    def _run(self):
+        while True:
+            self.check()
+            time.sleep(self.interval)
+
+def create_readiness_probe(engine):
+    return ReadinessProbe(engine, interval=float(os.getenv('HEALTH_CHECK_INTERVAL', '5'))).start()
@@ -1,11 +1,19 @@
-from sqlalchemy import Column, Integer, DateTime, create_engine
+from sqlalchemy import Column, Integer, DateTime, create_engine, func, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as upsert
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import NullPool
 from datetime import datetime
 import os
+import random
 
 Base = declarative_base()
 
+COUNTER_ID = 1
+COUNTER_SHARDS = max(1, int(os.getenv('COUNTER_SHARDS', '1')))
+COUNTER_SHARD_STRATEGY = os.getenv('COUNTER_SHARD_STRATEGY', 'random')
+SCHEMA_LOCK_ID = 727001
+
 class Counter(Base):
     __tablename__ = 'counters'
     
@@ -23,25 +31,102 @@ def get_database_url():
     
     return f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 
+def get_pool_options():
+    return {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        'pool_pre_ping': os.getenv('DB_POOL_PRE_PING', '1') == '1',
+    }
+
+engine = create_engine(get_database_url(), **get_pool_options())
+
+Session = scoped_session(sessionmaker(bind=engine))
+
 def get_engine():
-    database_url = get_database_url()
-    return create_engine(database_url)
+    return engine
+
+def create_probe_engine():
+    # Probes get their own connection, so an exhausted request pool cannot make the pod look unready.
+    timeout = int(os.getenv('HEALTH_CHECK_TIMEOUT', '2'))
+    return create_engine(
+        get_database_url(),
+        poolclass=NullPool,
+        connect_args={'connect_timeout': timeout, 'options': f'-c statement_timeout={timeout * 1000}'},
+    )
 
 def get_session():
-    engine = get_engine()
-    Session = sessionmaker(bind=engine)
     return Session()
 
-def init_db():
-    engine = get_engine()
-    Base.metadata.create_all(engine)
+def remove_session():
+    Session.remove()
+
+def get_pool_stats():
+    pool = engine.pool
+    return {
+        'size': pool.size(),
+        'checked_in': pool.checkedin(),
+        'checked_out': pool.checkedout(),
+        'overflow': pool.overflow(),
+    }
+
+def get_shard_ids():
+    return range(COUNTER_ID, COUNTER_ID + COUNTER_SHARDS)
+
+def pick_shard():
+    if COUNTER_SHARDS == 1:
+        return COUNTER_ID
+    if COUNTER_SHARD_STRATEGY == 'worker':
+        return COUNTER_ID + os.getpid() % COUNTER_SHARDS
+    return COUNTER_ID + random.randrange(COUNTER_SHARDS)
+
+def get_counter_value(session):
+    return session.query(func.coalesce(func.sum(Counter.value), 0)).scalar()
+
+def increment_counter(session, amount=1, shard=None):
+    # Returns the shard's new value, which is the total only with a single shard;
+    # summing every shard on each write would bring back the contention sharding removes.
+    shard = shard or pick_shard()
+    now = datetime.utcnow()
+    return session.execute(
+        upsert(Counter)
+        .values(id=shard, value=amount, created_at=now, updated_at=now)
+        .on_conflict_do_update(
+            index_elements=[Counter.id],
+            set_={'value': Counter.value + amount, 'updated_at': now}
+        )
+        .returning(Counter.value)
+    ).scalar()
+
+def compact_counter(session):
+    shards = (
+        session.query(Counter)
+        .filter(Counter.id != COUNTER_ID)
+        .order_by(Counter.id)
+        .with_for_update()
+        .all()
+    )
+    total = sum(shard.value for shard in shards if shard.value)
+    if not total:
+        return 0
     
-    session = get_session()
-    try:
-        counter = session.query(Counter).first()
-        if not counter:
-            counter = Counter(value=0)
-            session.add(counter)
-            session.commit()
-    finally:
-        session.close()
+    for shard in shards:
+        shard.value = 0
+    session.flush()
+    increment_counter(session, total, shard=COUNTER_ID)
+    return total
+
+def init_db():
+    with get_engine().begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.execute(text('SELECT pg_advisory_xact_lock(:lock_id)'), {'lock_id': SCHEMA_LOCK_ID})
+        
+        Base.metadata.create_all(connection)
+        
+        existing = set(connection.execute(select(Counter.id)).scalars())
+        missing = [shard for shard in get_shard_ids() if shard not in existing]
+        if missing:
+            connection.execute(insert(Counter), [{'id': shard, 'value': 0} for shard in missing])
+        
+        return missing
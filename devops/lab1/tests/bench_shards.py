@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app'))
+
+import models
+
+def run_increments(count):
+    session = models.get_session()
+    try:
+        for _ in range(count):
+            models.increment_counter(session, 1)
+            session.commit()
+    finally:
+        models.remove_session()
+
+def benchmark(shards, workers, increments):
+    models.COUNTER_SHARDS = shards
+    models.init_db()
+    
+    session = models.get_session()
+    initial = models.get_counter_value(session)
+    models.remove_session()
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(run_increments, [increments] * workers))
+    elapsed = time.perf_counter() - started
+    
+    session = models.get_session()
+    final = models.get_counter_value(session)
+    models.remove_session()
+    
+    total = workers * increments
+    assert final == initial + total, f"Lost updates with {shards} shards: expected {initial + total}, got {final}"
+    
+    return {
+        'shards': shards,
+        'workers': workers,
+        'increments': total,
+        'seconds': round(elapsed, 3),
+        'increments_per_second': round(total / elapsed, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare counter increment throughput for 1 vs K shard rows')
+    parser.add_argument('--shards', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--increments', type=int, default=200, help='increments per worker')
+    args = parser.parse_args()
+    
+    results = [benchmark(shards, args.workers, args.increments) for shards in (1, args.shards)]
+    
+    session = models.get_session()
+    models.compact_counter(session)
+    session.commit()
+    models.remove_session()
+    
+    print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
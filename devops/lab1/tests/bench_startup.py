@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'app')
+
+def measure_import():
+    env = dict(os.environ, DB_HOST='db.invalid', DB_PORT='1')
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-c', 'import app'],
+        cwd=APP_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    elapsed = time.perf_counter() - started
+    assert result.returncode == 0, f"Importing the app failed without a database:\n{result.stderr}"
+    return elapsed * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure lab1 app cold import time with no reachable database')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    
+    samples = [measure_import() for _ in range(args.runs)]
+    
+    print(json.dumps({
+        'runs': args.runs,
+        'min_ms': round(min(samples), 1),
+        'median_ms': round(statistics.median(samples), 1),
+        'max_ms': round(max(samples), 1),
+    }, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    exit(main())
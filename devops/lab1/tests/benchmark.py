@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import math
+import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+ENDPOINTS = {
+    'get-count': ('GET', '/get-count'),
+    'increment': ('POST', '/increment'),
+    'health': ('GET', '/health'),
+}
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    rank = max(0, math.ceil(pct / 100 * len(samples)) - 1)
+    return samples[rank]
+
+def summarize(name, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    completed = len(latencies)
+    return {
+        'endpoint': name,
+        'requests': completed + errors,
+        'successful': completed,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(completed / elapsed, 1) if elapsed else 0.0,
+        'latency_ms': {
+            'min': round(latencies[0], 2) if latencies else None,
+            'mean': round(sum(latencies) / completed, 2) if latencies else None,
+            'p50': round(percentile(latencies, 50), 2) if latencies else None,
+            'p95': round(percentile(latencies, 95), 2) if latencies else None,
+            'p99': round(percentile(latencies, 99), 2) if latencies else None,
+            'max': round(latencies[-1], 2) if latencies else None,
+        },
+    }
+
+def run_threads(base_url, method, path, total, concurrency):
+    latencies = []
+    errors = 0
+    local = threading.local()
+    sessions = []
+    
+    def call(_):
+        http = getattr(local, 'http', None)
+        if http is None:
+            http = local.http = requests.Session()
+            sessions.append(http)
+        started = time.perf_counter()
+        try:
+            response = http.request(method, f"{base_url}{path}", timeout=30)
+            ok = response.status_code == 200
+        except requests.RequestException:
+            ok = False
+        return ok, (time.perf_counter() - started) * 1000
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for ok, latency in executor.map(call, range(total)):
+            if ok:
+                latencies.append(latency)
+            else:
+                errors += 1
+    elapsed = time.perf_counter() - started
+    
+    for http in sessions:
+        http.close()
+    return latencies, errors, elapsed
+
+async def run_asyncio(base_url, method, path, total, concurrency):
+    import aiohttp
+    
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+    
+    async def worker(http):
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                async with http.request(method, f"{base_url}{path}") as response:
+                    await response.read()
+                    ok = response.status == 200
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+    
+    timeout = aiohttp.ClientTimeout(total=30)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as http:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(http) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    
+    return latencies, errors, elapsed
+
+def run_endpoint(args, name):
+    method, path = ENDPOINTS[name]
+    if args.mode == 'asyncio':
+        latencies, errors, elapsed = asyncio.run(
+            run_asyncio(args.url, method, path, args.requests, args.concurrency)
+        )
+    else:
+        latencies, errors, elapsed = run_threads(args.url, method, path, args.requests, args.concurrency)
+    return summarize(name, latencies, errors, elapsed)
+
+def read_count(base_url):
+    response = requests.get(f"{base_url}/get-count", timeout=10)
+    response.raise_for_status()
+    return response.json()['count']
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the lab1 counter API')
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--mode', choices=['threads', 'asyncio'], default='threads')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=1000, help='requests per endpoint')
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument('--settle', type=float, default=1.0,
+                        help='seconds to wait for write-behind flushes before checking the final count')
+    parser.add_argument('--output', help='write the JSON report to this file')
+    args = parser.parse_args()
+    
+    initial_count = read_count(args.url)
+    results = [run_endpoint(args, name) for name in args.endpoints]
+    time.sleep(args.settle)
+    final_count = read_count(args.url)
+    
+    increments = sum(r['successful'] for r in results if r['endpoint'] == 'increment')
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'target': args.url,
+        'mode': args.mode,
+        'concurrency': args.concurrency,
+        'python': platform.python_version(),
+        'results': results,
+        'counter': {
+            'initial': initial_count,
+            'final': final_count,
+            'successful_increments': increments,
+            'consistent': final_count == initial_count + increments,
+        },
+    }
+    
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    print(output)
+    
+    return 0 if report['counter']['consistent'] else 1
+
+if __name__ == '__main__':
+    exit(main())
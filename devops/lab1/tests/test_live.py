@@ -2,6 +2,7 @@
 import requests
 import time
 import json
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
 BASE_URL = "http://localhost:5000"
 
@@ -23,6 +24,27 @@ def test_health_endpoint():
         print(f"Health endpoint test failed: {e}")
         return False
 
+def test_liveness_and_readiness():
+    print("Testing liveness and readiness endpoints...")
+    try:
+        response = requests.get(f"{BASE_URL}/livez", timeout=10)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        assert response.json()['status'] == 'alive', f"Expected 'alive', got {response.json()['status']}"
+        
+        response = requests.get(f"{BASE_URL}/readyz", timeout=10)
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}"
+        
+        data = response.json()
+        assert data['ready'] is True, "Expected database to be ready"
+        assert 'latency_ms' in data, "Missing 'latency_ms' field"
+        assert 'age_seconds' in data, "Missing 'age_seconds' field"
+        
+        print(f"Liveness and readiness test passed (probe latency: {data['latency_ms']} ms)")
+        return True
+    except Exception as e:
+        print(f"Liveness and readiness test failed: {e}")
+        return False
+
 def test_get_count():
     print("Testing get count endpoint...")
     try:
@@ -82,6 +104,65 @@ def test_multiple_increments():
         print(f"Multiple increments test failed: {e}")
         return False
 
+# Write-behind flushes and the per-worker count cache let /get-count lag behind
+# acknowledged increments, so wait longer than both before comparing counts.
+SETTLE_SECONDS = 1.5
+
+def get_count():
+    response = requests.get(f"{BASE_URL}/get-count", timeout=10)
+    return response.json()['count']
+
+def settled_count(attempts=10):
+    count = get_count()
+    for _ in range(attempts):
+        time.sleep(SETTLE_SECONDS)
+        latest = get_count()
+        if latest == count:
+            break
+        count = latest
+    return count
+
+def wait_for_count(expected, timeout=10):
+    deadline = time.time() + timeout
+    count = get_count()
+    while count != expected and time.time() < deadline:
+        time.sleep(0.25)
+        count = get_count()
+    return count
+
+def send_increments(count, threads=8):
+    with requests.Session() as http:
+        def increment(_):
+            try:
+                return http.post(f"{BASE_URL}/increment", timeout=10).status_code == 200
+            except requests.RequestException:
+                return False
+        
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return sum(executor.map(increment, range(count)))
+
+def test_concurrent_increments():
+    print("Testing concurrent increments...")
+    try:
+        processes = 4
+        per_process = 50
+        
+        initial_count = settled_count()
+        
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            successful = sum(executor.map(send_increments, [per_process] * processes))
+        
+        final_count = wait_for_count(initial_count + successful)
+        
+        assert successful == processes * per_process, f"Only {successful} of {processes * per_process} increments succeeded"
+        assert final_count == initial_count + successful, f"Lost updates: expected {initial_count + successful}, got {final_count}"
+        
+        print(f"Concurrent increments test passed ({initial_count} -> {final_count})")
+        return True
+    except Exception as e:
+        print(f"Concurrent increments test failed: {e}")
+        return False
+
 def test_web_interface():
     print("Testing web interface...")
     try:
@@ -143,9 +224,11 @@ def main():
     
     tests = [
         test_health_endpoint,
+        test_liveness_and_readiness,
         test_get_count,
         test_increment_counter,
         test_multiple_increments,
+        test_concurrent_increments,
         test_web_interface,
         test_database_persistence,
         test_error_handling
@@ -0,0 +1,192 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+
+class Window:
+    __slots__ = ('start', 'count', 'amount', 'orders')
+
+    def __init__(self, start):
+        self.start = start
+        self.count = 0
+        self.amount = 0.0
+        self.orders = defaultdict(float)
+
+    def add(self, order_id, amount, count=1):
+        self.count += count
+        self.amount += amount
+        self.orders[order_id] += amount
+
+    def merge(self, other):
+        self.count += other.count
+        self.amount += other.amount
+        for order_id, amount in other.orders.items():
+            self.orders[order_id] += amount
+
+    def to_dict(self, top_orders=None):
+        orders = self.orders
+        if top_orders is not None:
+            orders = dict(sorted(orders.items(), key=lambda item: item[1], reverse=True)[:top_orders])
+        return {
+            'window_start': self.start,
+            'payments': self.count,
+            'amount': round(self.amount, 2),
+            'orders': {order_id: round(amount, 2) for order_id, amount in orders.items()},
+        }
+
+
+class WindowedAggregator:
+    def __init__(self, window_seconds=60, sliding_windows=5, retention_windows=60):
+        self.window_ms = int(window_seconds * 1000)
+        self.sliding_windows = sliding_windows
+        self.retention_windows = retention_windows
+        self.windows = {}
+        self.pending = {}
+        self.invalid = 0
+        self._lock = threading.Lock()
+
+    def add(self, timestamp_ms, event):
+        try:
+            amount = float(event['amount'])
+            order_id = str(event['order_id'])
+        except (KeyError, TypeError, ValueError):
+            self.invalid += 1
+            return
+
+        start = timestamp_ms - timestamp_ms % self.window_ms
+        with self._lock:
+            self._window(self.windows, start).add(order_id, amount)
+            self._window(self.pending, start).add(order_id, amount)
+
+    def take_pending(self):
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        return [window.to_dict() for window in sorted(pending.values(), key=lambda w: w.start)]
+
+    def restore(self, windows):
+        with self._lock:
+            for data in windows:
+                window = Window(data['window_start'])
+                window.count = data['payments']
+                window.amount = data['amount']
+                window.orders.update(data['orders'])
+                self._window(self.windows, window.start).merge(window)
+            self._expire()
+
+    def dump(self):
+        # Every retained window in full, for rewriting a sink as a single snapshot record.
+        with self._lock:
+            self._expire()
+            return [window.to_dict() for window in sorted(self.windows.values(), key=lambda w: w.start)]
+
+    def merge(self, other):
+        with other._lock:
+            windows = list(other.windows.values())
+            invalid = other.invalid
+        with self._lock:
+            for window in windows:
+                self._window(self.windows, window.start).merge(window)
+            self.invalid += invalid
+
+    def snapshot(self, top_orders=10, now_ms=None):
+        if now_ms is None:
+            now_ms = int(time.time() * 1000)
+        current_start = now_ms - now_ms % self.window_ms
+        sliding_start = current_start - (self.sliding_windows - 1) * self.window_ms
+
+        with self._lock:
+            self._expire()
+            windows = sorted(self.windows.values(), key=lambda w: w.start)
+            current = self.windows.get(current_start) or Window(current_start)
+            sliding = Window(sliding_start)
+            for window in windows:
+                if sliding_start <= window.start <= current_start:
+                    sliding.merge(window)
+            return {
+                'window_seconds': self.window_ms / 1000,
+                'current': current.to_dict(top_orders),
+                'sliding': dict(sliding.to_dict(top_orders), windows=self.sliding_windows),
+                'tumbling': [
+                    {'window_start': window.start, 'payments': window.count, 'amount': round(window.amount, 2)}
+                    for window in windows
+                ],
+                'invalid_events': self.invalid,
+            }
+
+    def _window(self, windows, start):
+        window = windows.get(start)
+        if window is None:
+            window = windows[start] = Window(start)
+        return window
+
+    def _expire(self):
+        if len(self.windows) > self.retention_windows:
+            for start in sorted(self.windows)[:-self.retention_windows]:
+                del self.windows[start]
+
+
+class JsonLinesSink:
+    """Append-only window deltas plus offsets, periodically rewritten as one snapshot record.
+
+    `records` counts the lines a load would replay; once it reaches `compact_every` the owner
+    calls compact() with the aggregator's retained windows, which replaces the file atomically.
+    """
+
+    def __init__(self, path, compact_every=300):
+        self.path = path
+        self.compact_every = compact_every
+        self.records = 0
+
+    def write(self, windows, offsets):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(encode_record(windows, offsets))
+            f.flush()
+            os.fsync(f.fileno())
+        self.records += 1
+
+    def needs_compaction(self):
+        return self.records >= self.compact_every
+
+    def compact(self, windows, offsets):
+        # Written beside the sink and renamed over it, so a crash leaves either the old file or the new one.
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(encode_record(windows, offsets))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        fsync_dir(os.path.dirname(self.path) or '.')
+        self.records = 1
+
+    def load(self):
+        windows = []
+        offsets = {}
+        self.records = 0
+        if not os.path.exists(self.path):
+            return windows, offsets
+
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash mid-write was never committed to Kafka either.
+                    continue
+                windows.extend(record['windows'])
+                offsets.update(record['offsets'])
+                self.records += 1
+        return windows, offsets
+
+
+def encode_record(windows, offsets):
+    return json.dumps({'windows': windows, 'offsets': offsets}, separators=(',', ':')) + '\n'
+
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
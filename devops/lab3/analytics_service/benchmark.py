@@ -0,0 +1,155 @@
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+import uuid
+
+from kafka import KafkaConsumer, KafkaProducer
+from kafka.admin import KafkaAdminClient, NewTopic
+
+from aggregation import JsonLinesSink, WindowedAggregator
+from listener import AnalyticsService, PartitionHandoffListener
+
+
+def make_event(i):
+    return {
+        'payment_id': str(uuid.uuid4()),
+        'order_id': f"order-{i}",
+        'amount': 100 + i % 50,
+        'status': 'completed',
+        'event_type': 'payment_processed',
+    }
+
+
+def create_topic(args):
+    topic = f"{args.topic}-{uuid.uuid4().hex[:8]}"
+    admin = KafkaAdminClient(bootstrap_servers=args.bootstrap.split(','))
+    admin.create_topics([NewTopic(topic, num_partitions=args.partitions, replication_factor=1)])
+    admin.close()
+
+    producer = KafkaProducer(
+        bootstrap_servers=args.bootstrap.split(','),
+        value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+        key_serializer=lambda k: k.encode('utf-8'),
+        linger_ms=5,
+    )
+    for i in range(args.messages):
+        event = make_event(i)
+        producer.send(topic, value=event, key=event['order_id'])
+    producer.flush()
+    producer.close()
+    return topic
+
+
+class BenchmarkService(AnalyticsService):
+    def __init__(self, *args, work_ms, processed, started, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.work = work_ms / 1000
+        self.processed = processed
+        self.started = started
+
+    def process(self, batch):
+        count = sum(len(records) for records in batch.values())
+        with self.started.get_lock():
+            if not self.started.value:
+                self.started.value = time.perf_counter()
+        # Stand-in for per-event enrichment work, which is what extra consumers actually parallelise.
+        time.sleep(self.work * count)
+        super().process(batch)
+        with self.processed.get_lock():
+            self.processed.value += count
+
+
+def run_consumer(args, topic, group, sink_dir, processed, started, done):
+    consumer = KafkaConsumer(
+        bootstrap_servers=args.bootstrap.split(','),
+        group_id=group,
+        auto_offset_reset='earliest',
+        enable_auto_commit=False,
+        max_poll_records=args.max_poll_records,
+    )
+    service = BenchmarkService(
+        consumer,
+        lambda: WindowedAggregator(60, 5),
+        sink_dir,
+        max_poll_records=args.max_poll_records,
+        poll_timeout_ms=100,
+        flush_interval=0.5,
+        work_ms=args.work_ms,
+        processed=processed,
+        started=started,
+    )
+    consumer.subscribe([topic], listener=PartitionHandoffListener(service))
+    while not done.is_set():
+        batch = consumer.poll(timeout_ms=100, max_records=args.max_poll_records)
+        if batch:
+            service.process(batch)
+        service.flush()
+    service.release(list(service.partitions))
+    consumer.close(autocommit=False)
+
+
+def counted_payments(sink_dir):
+    total = 0
+    for name in os.listdir(sink_dir):
+        windows, _ = JsonLinesSink(os.path.join(sink_dir, name)).load()
+        total += sum(window['payments'] for window in windows)
+    return total
+
+
+def run(args, topic, consumers):
+    group = f"analytics-bench-{uuid.uuid4().hex[:8]}"
+    sink_dir = tempfile.mkdtemp(prefix='analytics-bench-')
+    processed = multiprocessing.Value('q', 0)
+    started = multiprocessing.Value('d', 0.0)
+    done = multiprocessing.Event()
+
+    workers = [
+        multiprocessing.Process(target=run_consumer, args=(args, topic, group, sink_dir, processed, started, done))
+        for _ in range(consumers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    while processed.value < args.messages:
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started.value
+    done.set()
+    for worker in workers:
+        worker.join()
+    return elapsed, processed.value, counted_payments(sink_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure analytics throughput against the number of consumers in a group')
+    parser.add_argument('--bootstrap', default='localhost:9093')
+    parser.add_argument('--topic', default='analytics_orders_bench')
+    parser.add_argument('--partitions', type=int, default=6)
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--consumers', default='1,2,3,6')
+    parser.add_argument('--work-ms', type=float, default=0.2)
+    parser.add_argument('--max-poll-records', type=int, default=500)
+    args = parser.parse_args()
+
+    topic = create_topic(args)
+    results = []
+    for consumers in (int(value) for value in args.consumers.split(',')):
+        elapsed, processed, counted = run(args, topic, consumers)
+        results.append({
+            'consumers': consumers,
+            'partitions': args.partitions,
+            'messages': args.messages,
+            'processed': processed,
+            'counted_in_sink': counted,
+            'seconds': round(elapsed, 3),
+            'messages_per_second': round(args.messages / elapsed, 1),
+        })
+        print(f"{consumers:3} consumers {args.messages / elapsed:10.1f} msg/s  sink={counted}")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
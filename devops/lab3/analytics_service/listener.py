@@ -1,36 +1,255 @@
 import json
+import os
 import sys
-from kafka import KafkaConsumer
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from kafka import ConsumerRebalanceListener, KafkaConsumer
+from kafka.structs import OffsetAndMetadata
+
+from aggregation import JsonLinesSink, WindowedAggregator
+from serialization import DeserializationError, header_content_type, loads
+
+
+class PartitionHandoffListener(ConsumerRebalanceListener):
+    def __init__(self, service):
+        self.service = service
+
+    def on_partitions_revoked(self, revoked):
+        # Flush before the partitions move so the next owner starts exactly after what we already counted.
+        self.service.release(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        self.service.acquire(assigned)
+
+
+class PartitionState:
+    __slots__ = ('aggregator', 'sink', 'offset', 'unflushed')
+
+    def __init__(self, aggregator, sink):
+        self.aggregator = aggregator
+        self.sink = sink
+        self.offset = None
+        self.unflushed = 0
+
+
+class AnalyticsService:
+    def __init__(self, consumer, aggregator_factory, sink_dir, max_poll_records=500, poll_timeout_ms=500,
+                 flush_interval=1.0, sink_compact_every=300):
+        self.consumer = consumer
+        self.aggregator_factory = aggregator_factory
+        self.sink_dir = sink_dir
+        self.sink_compact_every = sink_compact_every
+        self.max_poll_records = max_poll_records
+        self.poll_timeout_ms = poll_timeout_ms
+        self.flush_interval = flush_interval
+        self.partitions = {}
+        self.stats = {
+            'records': 0,
+            'batches': 0,
+            'flushes': 0,
+            'compactions': 0,
+            'commit_errors': 0,
+            'assigned': 0,
+            'revoked': 0,
+            'last_flush': None,
+        }
+        self._lock = threading.Lock()
+        self._running = False
+        os.makedirs(sink_dir, exist_ok=True)
+
+    def acquire(self, partitions):
+        # Each partition has its own sink file, so whichever instance owns it next can pick up its state.
+        for tp in partitions:
+            state = PartitionState(
+                self.aggregator_factory(),
+                JsonLinesSink(os.path.join(self.sink_dir, f"{tp.topic}-{tp.partition}.jsonl"), self.sink_compact_every),
+            )
+            windows, offsets = state.sink.load()
+            state.aggregator.restore(windows)
+            state.offset = offsets.get(offset_key(tp))
+            if state.sink.records > 1:
+                # Rewrite what was just replayed as one snapshot, so the next handoff of this partition
+                # (a rebalance when consumers scale, or a crash) loads one record instead of the deltas.
+                state.sink.compact(state.aggregator.dump(), offsets)
+                self.stats['compactions'] += 1
+            if state.offset is not None:
+                # The sink is written before the commit, so after a crash between the two it is ahead of Kafka.
+                self.consumer.seek(tp, state.offset)
+            with self._lock:
+                self.partitions[tp] = state
+            self.stats['assigned'] += 1
+        if partitions:
+            print(f"[Analityka] Przydzielono partycje: {sorted(tp.partition for tp in partitions)}")
+
+    def release(self, partitions):
+        partitions = [tp for tp in partitions if tp in self.partitions]
+        self.flush(partitions)
+        with self._lock:
+            for tp in partitions:
+                del self.partitions[tp]
+        self.stats['revoked'] += len(partitions)
+        if partitions:
+            print(f"[Analityka] Oddano partycje: {sorted(tp.partition for tp in partitions)}")
+
+    def run(self):
+        self._running = True
+        next_flush = time.monotonic() + self.flush_interval
+        while self._running:
+            batch = self.consumer.poll(timeout_ms=self.poll_timeout_ms, max_records=self.max_poll_records)
+            if batch:
+                self.process(batch)
+            if time.monotonic() >= next_flush:
+                self.flush()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def stop(self):
+        self._running = False
+
+    def process(self, batch):
+        count = 0
+        for tp, records in batch.items():
+            state = self.partitions.get(tp)
+            if state is None:
+                continue
+            add = state.aggregator.add
+            for record in records:
+                try:
+                    event = loads(record.value, header_content_type(record.headers))
+                except DeserializationError:
+                    event = None
+                add(record.timestamp, event)
+            state.unflushed += len(records)
+            count += len(records)
+        self.stats['records'] += count
+        self.stats['batches'] += 1
+
+    def flush(self, partitions=None):
+        if partitions is None:
+            partitions = list(self.partitions)
+
+        commits = {}
+        for tp in partitions:
+            state = self.partitions[tp]
+            if not state.unflushed:
+                continue
+            offset = self.consumer.position(tp)
+            pending = state.aggregator.take_pending()
+            offsets = {offset_key(tp): offset}
+            if state.sink.needs_compaction():
+                # The retained windows already include this flush's deltas, so the snapshot replaces the append.
+                state.sink.compact(state.aggregator.dump(), offsets)
+                self.stats['compactions'] += 1
+            else:
+                state.sink.write(pending, offsets)
+            state.offset = offset
+            state.unflushed = 0
+            commits[tp] = OffsetAndMetadata(offset, '', -1)
+
+        if not commits:
+            return
+        try:
+            self.consumer.commit(commits)
+        except Exception as e:
+            # The sinks already have these offsets, so a restart resumes correctly even without the commit.
+            self.stats['commit_errors'] += 1
+            print(f"Failed to commit Kafka offsets: {e}")
+
+        self.stats['flushes'] += 1
+        self.stats['last_flush'] = time.time()
+
+    def get_metrics(self):
+        with self._lock:
+            partitions = dict(self.partitions)
+        combined = self.aggregator_factory()
+        for state in partitions.values():
+            combined.merge(state.aggregator)
+        metrics = combined.snapshot()
+        metrics['consumer'] = dict(
+            self.stats,
+            unflushed=sum(state.unflushed for state in partitions.values()),
+            offsets={offset_key(tp): state.offset for tp, state in partitions.items()},
+        )
+        return metrics
+
+
+def offset_key(tp):
+    return f"{tp.topic}:{tp.partition}"
+
+
+def start_metrics_server(service, port):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send(200, service.get_metrics())
+            elif self.path == '/health':
+                self._send(200, {'status': 'healthy', 'service': 'analytics_service'})
+            else:
+                self._send(404, {'error': 'Not found'})
+
+        def _send(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('0.0.0.0', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+    return server
 
 
 def main():
     print("Starting analytics service...")
 
+    max_poll_records = int(os.getenv('ANALYTICS_MAX_POLL_RECORDS', '500'))
     try:
         consumer = KafkaConsumer(
-            'analytics_orders',
-            bootstrap_servers=['kafka:9092'],
+            bootstrap_servers=os.getenv('KAFKA_BROKER', 'kafka:9092').split(','),
             group_id='analytics-group',
             auto_offset_reset='earliest',
-            enable_auto_commit=True,
-            value_deserializer=lambda v: json.loads(v.decode('utf-8')),
-            key_deserializer=lambda k: k.decode('utf-8') if k else None,
+            enable_auto_commit=False,
+            max_poll_records=max_poll_records,
+            fetch_min_bytes=int(os.getenv('ANALYTICS_FETCH_MIN_BYTES', '1')),
         )
     except Exception as e:
         print(f"Failed to create Kafka consumer: {e}")
         sys.exit(1)
 
+    window_seconds = float(os.getenv('ANALYTICS_WINDOW_SECONDS', '60'))
+    sliding_windows = int(os.getenv('ANALYTICS_SLIDING_WINDOWS', '5'))
+    retention_windows = int(os.getenv('ANALYTICS_RETENTION_WINDOWS', '60'))
+    service = AnalyticsService(
+        consumer,
+        lambda: WindowedAggregator(window_seconds, sliding_windows, retention_windows),
+        os.getenv('ANALYTICS_SINK_DIR', 'analytics_data'),
+        max_poll_records=max_poll_records,
+        poll_timeout_ms=int(os.getenv('ANALYTICS_POLL_TIMEOUT_MS', '500')),
+        flush_interval=float(os.getenv('ANALYTICS_FLUSH_INTERVAL_MS', '1000')) / 1000,
+        sink_compact_every=int(os.getenv('ANALYTICS_SINK_COMPACT_EVERY', '300')),
+    )
+    consumer.subscribe(['analytics_orders'], listener=PartitionHandoffListener(service))
+    server = start_metrics_server(service, int(os.getenv('ANALYTICS_METRICS_PORT', '8000')))
+
     print("Analytics service is consuming messages from 'analytics_orders'...")
 
     try:
-        for message in consumer:
-            event = message.value
-            print(f"[Analityka] Otrzymano zdarzenie płatności: {json.dumps(event, ensure_ascii=False)}")
+        service.run()
     except KeyboardInterrupt:
         print("Stopping analytics service...")
     finally:
         try:
-            consumer.close()
+            service.release(list(service.partitions))
+        except Exception as e:
+            print(f"Failed to flush analytics on shutdown: {e}")
+        server.shutdown()
+        try:
+            consumer.close(autocommit=False)
         except Exception:
             pass
 
@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class OutboxRelay:
+    def __init__(self, store, publisher, batch_size=100, interval=0.5, lease=30, retention=3600,
+                 prune_interval=60):
+        self.store = store
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lease = lease
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.stats = {
+            'claimed': 0,
+            'published': 0,
+            'confirmed': 0,
+            'deferred': 0,
+            'skipped_in_flight': 0,
+            'errors': 0,
+        }
+        # Ids handed to this process's publisher and not yet marked sent. The publisher keeps those
+        # messages (queued, retried on reconnect or nack) until they are confirmed, so a reclaim after
+        # the lease expires must not hand them over a second time.
+        self._in_flight = set()
+        self._confirmed = deque()
+        self._wakeup = threading.Event()
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='outbox-relay', daemon=True).start()
+
+    def notify(self):
+        self.start()
+        self._wakeup.set()
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['awaiting_mark'] = len(self._confirmed)
+        stats['in_flight'] = len(self._in_flight)
+        return stats
+
+    def _run(self):
+        next_prune = time.monotonic() + self.prune_interval
+        while True:
+            try:
+                self._mark_confirmed()
+                drained = self.relay_batch() < self.batch_size
+                if time.monotonic() >= next_prune:
+                    self.store.prune_outbox(self.retention)
+                    next_prune = time.monotonic() + self.prune_interval
+            except Exception as e:
+                self.stats['errors'] += 1
+                print(f"Outbox relay failed: {e}")
+                drained = True
+
+            if drained:
+                self._wakeup.wait(self.interval)
+                self._wakeup.clear()
+
+    def relay_batch(self):
+        # Claims are leased, so a row whose confirm never arrives because this process died is retried
+        # by whichever relay claims it next. Rows still in flight here only get their lease renewed.
+        events = self.store.claim_outbox(self.batch_size, self.lease)
+        self.stats['claimed'] += len(events)
+        handed_over = 0
+        for event_id, message in events:
+            if event_id in self._in_flight:
+                self.stats['skipped_in_flight'] += 1
+                continue
+            handed_over += 1
+            if not self.publisher.publish(message, message_id=str(event_id),
+                                          on_confirm=lambda event_id=event_id: self._on_confirm(event_id)):
+                self.stats['deferred'] += 1
+                continue
+            self._in_flight.add(event_id)
+            self.stats['published'] += 1
+        return handed_over
+
+    def _on_confirm(self, event_id):
+        # Runs on the publisher's I/O thread, so only queue the id; the relay thread does the write.
+        self._confirmed.append(event_id)
+        self._wakeup.set()
+
+    def _mark_confirmed(self):
+        event_ids = []
+        while self._confirmed:
+            event_ids.append(self._confirmed.popleft())
+        if event_ids:
+            try:
+                self.store.mark_outbox_sent(event_ids)
+            except Exception:
+                self._confirmed.extendleft(reversed(event_ids))
+                raise
+            self._in_flight.difference_update(event_ids)
+            self.stats['confirmed'] += len(event_ids)
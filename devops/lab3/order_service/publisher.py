@@ -0,0 +1,171 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import pika
+
+from serialization import JsonSerializer
+
+
+class RabbitMQPublisher:
+    def __init__(self, url, queue_name, max_pending=10000, reconnect_delay=2, serializer=None):
+        self.parameters = pika.URLParameters(url)
+        self.serializer = serializer or JsonSerializer()
+        self.queue_name = queue_name
+        self.reconnect_delay = reconnect_delay
+        self.stats = {
+            'published': 0,
+            'confirmed': 0,
+            'nacked': 0,
+            'dropped': 0,
+            'reconnects': 0,
+        }
+        self._outbox = queue.Queue(maxsize=max_pending)
+        self._retry = deque()
+        self._unconfirmed = {}
+        self._delivery_tag = 0
+        self._connection = None
+        self._channel = None
+        self._ready = False
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, message, message_id=None, on_confirm=None):
+        self._ensure_started()
+        try:
+            self._outbox.put_nowait((self.serializer.dumps(message), message_id, on_confirm))
+        except queue.Full:
+            self.stats['dropped'] += 1
+            print(f"RabbitMQ publisher backlog full, dropping message: {message}")
+            return False
+
+        connection = self._connection
+        if connection is not None and self._ready:
+            try:
+                connection.ioloop.add_callback_threadsafe(self._drain)
+            except Exception:
+                pass
+        return True
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['pending'] = self._outbox.qsize() + len(self._retry)
+        stats['unconfirmed'] = len(self._unconfirmed)
+        stats['connected'] = self._ready
+        stats['content_type'] = self.serializer.content_type
+        return stats
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='rabbitmq-publisher', daemon=True).start()
+
+    def _run(self):
+        while True:
+            self._connection = pika.SelectConnection(
+                self.parameters,
+                on_open_callback=self._on_connection_open,
+                on_open_error_callback=self._on_connection_error,
+                on_close_callback=self._on_connection_closed,
+            )
+            try:
+                self._connection.ioloop.start()
+            except Exception as e:
+                print(f"RabbitMQ publisher loop failed: {e}")
+            self._ready = False
+            self._connection = None
+            self.stats['reconnects'] += 1
+            time.sleep(self.reconnect_delay)
+
+    def _on_connection_open(self, connection):
+        connection.channel(on_open_callback=self._on_channel_open)
+
+    def _on_connection_error(self, connection, error):
+        print(f"Failed to connect to RabbitMQ: {error}")
+        connection.ioloop.stop()
+
+    def _on_connection_closed(self, connection, reason):
+        print(f"RabbitMQ connection closed: {reason}")
+        self._reset_channel()
+        connection.ioloop.stop()
+
+    def _on_channel_open(self, channel):
+        self._channel = channel
+        channel.add_on_close_callback(self._on_channel_closed)
+        channel.confirm_delivery(self._on_delivery_confirmation)
+        channel.queue_declare(queue=self.queue_name, durable=True, callback=self._on_queue_declared)
+
+    def _on_channel_closed(self, channel, reason):
+        print(f"RabbitMQ channel closed: {reason}")
+        self._reset_channel()
+        if self._connection is not None and self._connection.is_open:
+            self._connection.close()
+
+    def _on_queue_declared(self, frame):
+        self._ready = True
+        self._schedule_drain()
+
+    def _schedule_drain(self):
+        if self._ready:
+            self._drain()
+            self._connection.ioloop.call_later(0.1, self._schedule_drain)
+
+    def _drain(self):
+        if not self._ready:
+            return
+        while True:
+            if self._retry:
+                entry = self._retry.popleft()
+            else:
+                try:
+                    entry = self._outbox.get_nowait()
+                except queue.Empty:
+                    return
+            body, message_id, _ = entry
+            self._delivery_tag += 1
+            self._unconfirmed[self._delivery_tag] = entry
+            self._channel.basic_publish(
+                exchange='',
+                routing_key=self.queue_name,
+                body=body,
+                properties=pika.BasicProperties(
+                    delivery_mode=2,
+                    content_type=self.serializer.content_type,
+                    message_id=message_id,
+                )
+            )
+            self.stats['published'] += 1
+
+    def _on_delivery_confirmation(self, frame):
+        method = frame.method
+        if method.multiple:
+            tags = [tag for tag in self._unconfirmed if tag <= method.delivery_tag]
+        else:
+            tags = [method.delivery_tag]
+
+        acked = isinstance(method, pika.spec.Basic.Ack)
+        for tag in tags:
+            entry = self._unconfirmed.pop(tag, None)
+            if entry is None:
+                continue
+            if acked:
+                self.stats['confirmed'] += 1
+                on_confirm = entry[2]
+                if on_confirm is not None:
+                    on_confirm()
+            else:
+                self.stats['nacked'] += 1
+                self._retry.append(entry)
+
+    def _reset_channel(self):
+        self._ready = False
+        self._channel = None
+        self._retry.extend(self._unconfirmed[tag] for tag in sorted(self._unconfirmed))
+        self._unconfirmed.clear()
+        self._delivery_tag = 0
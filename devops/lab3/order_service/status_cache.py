@@ -0,0 +1,338 @@
+import asyncio
+import threading
+import time
+
+from store import LRUCache
+
+MISSING = '__missing__'
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'done': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+
+        if not leader:
+            call['done'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result'], False
+
+        try:
+            call['result'] = fn()
+            return call['result'], True
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call['done'].set()
+
+
+class OrderStatusCache:
+    def __init__(self, redis_client, ttl=300, negative_ttl=5, l1_size=10000, l1_ttl=1.0,
+                 lock_ttl=2.0, lock_wait=0.5):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock_ttl_ms = int(lock_ttl * 1000)
+        self.lock_wait = lock_wait
+        self.l1 = LRUCache(l1_size, l1_ttl)
+        self.single_flight = SingleFlight()
+        self.stats = {
+            'l1_hits': 0,
+            'redis_hits': 0,
+            'store_loads': 0,
+            'negative_hits': 0,
+            'coalesced': 0,
+            'redis_errors': 0,
+        }
+
+    def get(self, order_id, loader):
+        status = self.l1.get(order_id)
+        if status is not None:
+            self.stats['l1_hits'] += 1
+            return self._result(status, 'l1')
+
+        status = self._redis_get(order_id)
+        if status is not None:
+            self.stats['redis_hits'] += 1
+            self.l1.put(order_id, status)
+            return self._result(status, 'redis')
+
+        (status, source), leader = self.single_flight.do(order_id, lambda: self._load(order_id, loader))
+        if not leader:
+            self.stats['coalesced'] += 1
+        self.l1.put(order_id, status)
+        return self._result(status, source)
+
+    def get_many(self, order_ids, loader_many):
+        results = {}
+        remaining = []
+        for order_id in order_ids:
+            status = self.l1.get(order_id)
+            if status is None:
+                remaining.append(order_id)
+            else:
+                self.stats['l1_hits'] += 1
+                results[order_id] = self._result(status, 'l1')
+
+        if remaining:
+            try:
+                cached = self.redis.mget([self._key(order_id) for order_id in remaining])
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                print(f"Failed to read order statuses from Redis: {e}")
+                cached = [None] * len(remaining)
+
+            misses = []
+            for order_id, status in zip(remaining, cached):
+                if status is None:
+                    misses.append(order_id)
+                else:
+                    self.stats['redis_hits'] += 1
+                    self.l1.put(order_id, status)
+                    results[order_id] = self._result(status, 'redis')
+
+            if misses:
+                self.stats['store_loads'] += len(misses)
+                orders = loader_many(misses)
+                pipeline = self.redis.pipeline(transaction=False)
+                for order_id in misses:
+                    order = orders.get(order_id)
+                    status = order['status'] if order else MISSING
+                    ttl = self.ttl if order else self.negative_ttl
+                    pipeline.set(self._key(order_id), status, ex=ttl, nx=True)
+                    self.l1.put(order_id, status)
+                    results[order_id] = self._result(status, 'store')
+                try:
+                    pipeline.execute()
+                except Exception as e:
+                    self.stats['redis_errors'] += 1
+                    print(f"Failed to write order statuses to Redis: {e}")
+
+        return results
+
+    def set(self, order_id, status):
+        self.l1.put(order_id, status)
+        try:
+            self.redis.setex(self._key(order_id), self.ttl, status)
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"Failed to write order status to Redis: {e}")
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        lookups = stats['l1_hits'] + stats['redis_hits'] + stats['store_loads'] + stats['coalesced']
+        stats['lookups'] = lookups
+        if lookups:
+            stats['l1_hit_ratio'] = round(stats['l1_hits'] / lookups, 4)
+            redis_lookups = lookups - stats['l1_hits']
+            stats['redis_hit_ratio'] = round(stats['redis_hits'] / redis_lookups, 4) if redis_lookups else 0.0
+        return stats
+
+    def _result(self, status, source):
+        if status == MISSING:
+            self.stats['negative_hits'] += 1
+            return None, source
+        return status, source
+
+    def _key(self, order_id):
+        return f"order_status:{order_id}"
+
+    def _redis_get(self, order_id):
+        try:
+            return self.redis.get(self._key(order_id))
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"Failed to read order status from Redis: {e}")
+            return None
+
+    def _load(self, order_id, loader):
+        lock_key = f"order_status_lock:{order_id}"
+        try:
+            acquired = self.redis.set(lock_key, '1', nx=True, px=self.lock_ttl_ms)
+        except Exception:
+            self.stats['redis_errors'] += 1
+            acquired = True
+
+        if not acquired:
+            # Another worker is loading this order; wait briefly for it to fill Redis.
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                time.sleep(0.01)
+                status = self._redis_get(order_id)
+                if status is not None:
+                    self.stats['coalesced'] += 1
+                    return status, 'redis'
+
+        try:
+            self.stats['store_loads'] += 1
+            order = loader(order_id)
+            if order is None:
+                status = MISSING
+                ttl = self.negative_ttl
+            else:
+                status = order['status']
+                ttl = self.ttl
+            try:
+                # NX so a concurrent write-through of a newer status is never overwritten.
+                self.redis.set(self._key(order_id), status, ex=ttl, nx=True)
+            except Exception:
+                self.stats['redis_errors'] += 1
+            return status, 'store'
+        finally:
+            if acquired:
+                try:
+                    self.redis.delete(lock_key)
+                except Exception:
+                    pass
+
+
+class AsyncSingleFlight:
+    def __init__(self):
+        self._calls = {}
+
+    async def do(self, key, fn):
+        task = self._calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        # Shielded so one cancelled request does not cancel the load everyone else is waiting on.
+        return await asyncio.shield(task), leader
+
+
+class AsyncOrderStatusCache(OrderStatusCache):
+    def __init__(self, redis_client, **kwargs):
+        super().__init__(redis_client, **kwargs)
+        self.single_flight = AsyncSingleFlight()
+
+    async def get(self, order_id, loader):
+        status = self.l1.get(order_id)
+        if status is not None:
+            self.stats['l1_hits'] += 1
+            return self._result(status, 'l1')
+
+        status = await self._redis_get(order_id)
+        if status is not None:
+            self.stats['redis_hits'] += 1
+            self.l1.put(order_id, status)
+            return self._result(status, 'redis')
+
+        (status, source), leader = await self.single_flight.do(order_id, lambda: self._load(order_id, loader))
+        if not leader:
+            self.stats['coalesced'] += 1
+        self.l1.put(order_id, status)
+        return self._result(status, source)
+
+    async def get_many(self, order_ids, loader_many):
+        results = {}
+        remaining = []
+        for order_id in order_ids:
+            status = self.l1.get(order_id)
+            if status is None:
+                remaining.append(order_id)
+            else:
+                self.stats['l1_hits'] += 1
+                results[order_id] = self._result(status, 'l1')
+
+        if remaining:
+            try:
+                cached = await self.redis.mget([self._key(order_id) for order_id in remaining])
+            except Exception as e:
+                self.stats['redis_errors'] += 1
+                print(f"Failed to read order statuses from Redis: {e}")
+                cached = [None] * len(remaining)
+
+            misses = []
+            for order_id, status in zip(remaining, cached):
+                if status is None:
+                    misses.append(order_id)
+                else:
+                    self.stats['redis_hits'] += 1
+                    self.l1.put(order_id, status)
+                    results[order_id] = self._result(status, 'redis')
+
+            if misses:
+                self.stats['store_loads'] += len(misses)
+                orders = await loader_many(misses)
+                pipeline = self.redis.pipeline(transaction=False)
+                for order_id in misses:
+                    order = orders.get(order_id)
+                    status = order['status'] if order else MISSING
+                    ttl = self.ttl if order else self.negative_ttl
+                    pipeline.set(self._key(order_id), status, ex=ttl, nx=True)
+                    self.l1.put(order_id, status)
+                    results[order_id] = self._result(status, 'store')
+                try:
+                    await pipeline.execute()
+                except Exception as e:
+                    self.stats['redis_errors'] += 1
+                    print(f"Failed to write order statuses to Redis: {e}")
+
+        return results
+
+    async def set(self, order_id, status):
+        self.l1.put(order_id, status)
+        try:
+            await self.redis.setex(self._key(order_id), self.ttl, status)
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"Failed to write order status to Redis: {e}")
+
+    async def _redis_get(self, order_id):
+        try:
+            return await self.redis.get(self._key(order_id))
+        except Exception as e:
+            self.stats['redis_errors'] += 1
+            print(f"Failed to read order status from Redis: {e}")
+            return None
+
+    async def _load(self, order_id, loader):
+        lock_key = f"order_status_lock:{order_id}"
+        try:
+            acquired = await self.redis.set(lock_key, '1', nx=True, px=self.lock_ttl_ms)
+        except Exception:
+            self.stats['redis_errors'] += 1
+            acquired = True
+
+        if not acquired:
+            deadline = time.monotonic() + self.lock_wait
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                status = await self._redis_get(order_id)
+                if status is not None:
+                    self.stats['coalesced'] += 1
+                    return status, 'redis'
+
+        try:
+            self.stats['store_loads'] += 1
+            order = await loader(order_id)
+            if order is None:
+                status = MISSING
+                ttl = self.negative_ttl
+            else:
+                status = order['status']
+                ttl = self.ttl
+            try:
+                await self.redis.set(self._key(order_id), status, ex=ttl, nx=True)
+            except Exception:
+                self.stats['redis_errors'] += 1
+            return status, 'store'
+        finally:
+            if acquired:
+                try:
+                    await self.redis.delete(lock_key)
+                except Exception:
+                    pass
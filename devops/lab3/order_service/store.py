@@ -0,0 +1,382 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+STATUSES = ['nowe', 'opłacone', 'wysłane', 'dostarczone', 'anulowane']
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id BLOB PRIMARY KEY,
+    status INTEGER NOT NULL,
+    created_at INTEGER NOT NULL,
+    items TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status);
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payload TEXT NOT NULL,
+    created_at INTEGER NOT NULL,
+    claimed_until INTEGER,
+    sent_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_unsent ON outbox (id) WHERE sent_at IS NULL;
+"""
+
+
+class LRUCache:
+    def __init__(self, max_size, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._items[key] = (value, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class OrderStore:
+    def __init__(self, cache_size=10000, cache_ttl=5):
+        self.cache = LRUCache(cache_size, cache_ttl)
+
+    def add(self, order, events=()):
+        self._insert([order], events)
+        self.cache.put(order['id'], order)
+
+    def add_many(self, orders, events=()):
+        self._insert(orders, events)
+        for order in orders:
+            self.cache.put(order['id'], order)
+
+    def get(self, order_id):
+        order = self.cache.get(order_id)
+        if order is None:
+            order = self._select(order_id)
+            if order is not None:
+                self.cache.put(order_id, order)
+        return order
+
+    def get_many(self, order_ids):
+        orders = {}
+        missing = []
+        for order_id in order_ids:
+            order = self.cache.get(order_id)
+            if order is None:
+                missing.append(order_id)
+            else:
+                orders[order_id] = order
+
+        if missing:
+            for order in self._select_many(missing):
+                self.cache.put(order['id'], order)
+                orders[order['id']] = order
+        return orders
+
+    def update_status(self, order_id, status):
+        if status not in STATUS_CODES:
+            raise ValueError(f"Unknown order status: {status}")
+        order = self._update_status(order_id, status)
+        if order is not None:
+            self.cache.put(order_id, order)
+        return order
+
+    def get_stats(self):
+        return {
+            'backend': self.backend,
+            'cached_orders': len(self.cache),
+            'outbox_unsent': self.count_outbox_unsent(),
+        }
+
+
+class MemoryOrderStore(OrderStore):
+    backend = 'memory'
+
+    def __init__(self, cache_size=10000, cache_ttl=5):
+        super().__init__(cache_size, cache_ttl)
+        self._orders = {}
+        self._outbox = {}
+        self._outbox_id = 0
+        self._lock = threading.Lock()
+
+    def _insert(self, orders, events=()):
+        with self._lock:
+            for order in orders:
+                self._orders[order['id']] = order
+            for event in events:
+                self._outbox_id += 1
+                self._outbox[self._outbox_id] = {'payload': event, 'claimed_until': 0, 'sent_at': None}
+
+    def claim_outbox(self, limit, lease):
+        now = now_ms()
+        claimed = []
+        with self._lock:
+            for event_id, row in self._outbox.items():
+                if len(claimed) >= limit:
+                    break
+                if row['sent_at'] is None and row['claimed_until'] < now:
+                    row['claimed_until'] = now + int(lease * 1000)
+                    claimed.append((event_id, row['payload']))
+        return claimed
+
+    def mark_outbox_sent(self, event_ids):
+        now = now_ms()
+        with self._lock:
+            for event_id in event_ids:
+                row = self._outbox.get(event_id)
+                if row is not None:
+                    row['sent_at'] = now
+
+    def prune_outbox(self, retention):
+        cutoff = now_ms() - int(retention * 1000)
+        with self._lock:
+            for event_id in [event_id for event_id, row in self._outbox.items()
+                             if row['sent_at'] is not None and row['sent_at'] < cutoff]:
+                del self._outbox[event_id]
+
+    def count_outbox_unsent(self):
+        with self._lock:
+            return sum(1 for row in self._outbox.values() if row['sent_at'] is None)
+
+    def _select(self, order_id):
+        return self._orders.get(order_id)
+
+    def _select_many(self, order_ids):
+        return [self._orders[order_id] for order_id in order_ids if order_id in self._orders]
+
+    def _update_status(self, order_id, status):
+        order = self._orders.get(order_id)
+        if order is not None:
+            order = dict(order, status=status)
+            self._orders[order_id] = order
+        return order
+
+
+class SQLiteOrderStore(OrderStore):
+    backend = 'sqlite'
+
+    def __init__(self, path, cache_size=10000, cache_ttl=5):
+        super().__init__(cache_size, cache_ttl)
+        self.path = path
+        self._local = threading.local()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def _insert(self, orders, events=()):
+        created_at = now_ms()
+        entry = {
+            'rows': [to_row(order) for order in orders],
+            'events': [(json.dumps(event, separators=(',', ':')), created_at) for event in events],
+            'done': False,
+            'error': None,
+        }
+        with self._pending_lock:
+            self._pending.append(entry)
+
+        # Group commit: whoever holds the write lock flushes every pending insert in one transaction.
+        with self._write_lock:
+            if not entry['done']:
+                self._flush_pending()
+
+        if entry['error'] is not None:
+            raise entry['error']
+
+    def _flush_pending(self):
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+
+        connection = self._connection()
+        error = None
+        try:
+            connection.execute('BEGIN IMMEDIATE')
+            connection.executemany(
+                'INSERT INTO orders (id, status, created_at, items) VALUES (?, ?, ?, ?)',
+                [row for entry in batch for row in entry['rows']]
+            )
+            # Events commit in the same transaction as their orders, so neither exists without the other.
+            connection.executemany(
+                'INSERT INTO outbox (payload, created_at) VALUES (?, ?)',
+                [event for entry in batch for event in entry['events']]
+            )
+            connection.execute('COMMIT')
+        except Exception as e:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            error = e
+
+        for entry in batch:
+            entry['error'] = error
+            entry['done'] = True
+
+    def _select(self, order_id):
+        row = self._connection().execute(
+            'SELECT id, status, created_at, items FROM orders WHERE id = ?',
+            (pack_id(order_id),)
+        ).fetchone()
+        return from_row(row) if row else None
+
+    def _select_many(self, order_ids, chunk_size=500):
+        connection = self._connection()
+        orders = []
+        for start in range(0, len(order_ids), chunk_size):
+            chunk = [pack_id(order_id) for order_id in order_ids[start:start + chunk_size]]
+            placeholders = ','.join('?' * len(chunk))
+            rows = connection.execute(
+                f'SELECT id, status, created_at, items FROM orders WHERE id IN ({placeholders})',
+                chunk
+            ).fetchall()
+            orders.extend(from_row(row) for row in rows)
+        return orders
+
+    def _update_status(self, order_id, status):
+        connection = self._connection()
+        with self._write_lock:
+            connection.execute(
+                'UPDATE orders SET status = ? WHERE id = ?',
+                (STATUS_CODES[status], pack_id(order_id))
+            )
+        return self._select(order_id)
+
+    def claim_outbox(self, limit, lease):
+        now = now_ms()
+        connection = self._connection()
+        with self._write_lock:
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                rows = connection.execute(
+                    'SELECT id, payload FROM outbox '
+                    'WHERE sent_at IS NULL AND (claimed_until IS NULL OR claimed_until < ?) '
+                    'ORDER BY id LIMIT ?',
+                    (now, limit)
+                ).fetchall()
+                connection.executemany(
+                    'UPDATE outbox SET claimed_until = ? WHERE id = ?',
+                    [(now + int(lease * 1000), event_id) for event_id, _ in rows]
+                )
+                connection.execute('COMMIT')
+            except Exception:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                raise
+        return [(event_id, json.loads(payload)) for event_id, payload in rows]
+
+    def mark_outbox_sent(self, event_ids, chunk_size=500):
+        if not event_ids:
+            return
+        now = now_ms()
+        connection = self._connection()
+        with self._write_lock:
+            try:
+                connection.execute('BEGIN IMMEDIATE')
+                for start in range(0, len(event_ids), chunk_size):
+                    chunk = event_ids[start:start + chunk_size]
+                    placeholders = ','.join('?' * len(chunk))
+                    connection.execute(f'UPDATE outbox SET sent_at = ? WHERE id IN ({placeholders})', [now, *chunk])
+                connection.execute('COMMIT')
+            except Exception:
+                if connection.in_transaction:
+                    connection.execute('ROLLBACK')
+                raise
+
+    def prune_outbox(self, retention):
+        connection = self._connection()
+        with self._write_lock:
+            connection.execute(
+                'DELETE FROM outbox WHERE sent_at IS NOT NULL AND sent_at < ?',
+                (now_ms() - int(retention * 1000),)
+            )
+
+    def count_outbox_unsent(self):
+        return self._connection().execute('SELECT COUNT(*) FROM outbox WHERE sent_at IS NULL').fetchone()[0]
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def canonical_id(order_id):
+    # uuid.UUID also accepts hyphenless, braced and urn:uuid: spellings; every
+    # cache key has to use the one spelling the store hands back.
+    try:
+        return str(uuid.UUID(order_id))
+    except ValueError:
+        return order_id
+
+
+def pack_id(order_id):
+    try:
+        return uuid.UUID(order_id).bytes
+    except ValueError:
+        return order_id.encode('utf-8')
+
+
+def to_row(order):
+    created_at = datetime.fromisoformat(order['created_at']).timestamp()
+    return (
+        pack_id(order['id']),
+        STATUS_CODES[order['status']],
+        int(created_at * 1000),
+        json.dumps(order['items'], separators=(',', ':')),
+    )
+
+
+def from_row(row):
+    order_id, status, created_at, items = row
+    return {
+        'id': str(uuid.UUID(bytes=order_id)) if len(order_id) == 16 else order_id.decode('utf-8'),
+        'status': STATUSES[status],
+        'created_at': datetime.fromtimestamp(created_at / 1000, timezone.utc).isoformat(),
+        'items': json.loads(items),
+    }
+
+
+def create_order_store():
+    backend = os.getenv('ORDER_STORE', 'sqlite')
+    cache_size = int(os.getenv('ORDER_CACHE_SIZE', '10000'))
+    cache_ttl = float(os.getenv('ORDER_CACHE_TTL', '5'))
+    if backend == 'memory':
+        return MemoryOrderStore(cache_size, cache_ttl)
+    if backend == 'sqlite':
+        return SQLiteOrderStore(os.getenv('ORDER_DB_PATH', 'orders.db'), cache_size, cache_ttl)
+    raise ValueError(f"ORDER_STORE must be 'sqlite' or 'memory', got '{backend}'")
@@ -1,25 +1,21 @@
-import json
 import uuid
 from flask import Flask, request, jsonify
-from kafka import KafkaProducer
+from producer import KafkaEventPublisher, producer_config_from_env
+from serialization import serializer_from_env
 
 app = Flask(__name__)
 
-kafka_producer = KafkaProducer(
-    bootstrap_servers=['kafka:9092'],
-    value_serializer=lambda v: json.dumps(v).encode('utf-8'),
-    key_serializer=lambda k: k.encode('utf-8') if k else None
+kafka_publisher = KafkaEventPublisher(
+    producer_config_from_env(),
+    serializer=serializer_from_env('payment_event.v2')
 )
 
 def send_to_kafka(topic, message, key=None):
-    try:
-        future = kafka_producer.send(topic, value=message, key=key)
-        kafka_producer.flush()
-        print(f"Message sent to Kafka topic '{topic}': {message}")
+    if kafka_publisher.publish(topic, message, key):
+        print(f"Message queued for Kafka topic '{topic}': {message}")
         return True
-    except Exception as e:
-        print(f"Failed to send message to Kafka: {e}")
-        return False
+    print(f"Failed to queue message for Kafka topic '{topic}', scheduled for retry")
+    return False
 
 @app.route('/process_payment', methods=['POST'])
 def process_payment():
@@ -74,7 +70,11 @@ def process_payment():
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'healthy', 'service': 'payment_service'})
+    return jsonify({
+        'status': 'healthy',
+        'service': 'payment_service',
+        'kafka': kafka_publisher.get_stats()
+    })
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5002, debug=True)
@@ -0,0 +1,86 @@
+import uuid
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from producer import AsyncKafkaEventPublisher, producer_config_from_env
+from serialization import serializer_from_env
+
+kafka_publisher = AsyncKafkaEventPublisher(
+    producer_config_from_env(),
+    serializer=serializer_from_env('payment_event.v2')
+)
+
+
+async def send_to_kafka(topic, message, key=None):
+    if await kafka_publisher.publish(topic, message, key):
+        print(f"Message queued for Kafka topic '{topic}': {message}")
+        return True
+    print(f"Failed to queue message for Kafka topic '{topic}', scheduled for retry")
+    return False
+
+
+async def process_payment(request):
+    try:
+        try:
+            payment_data = await request.json()
+        except ValueError:
+            payment_data = None
+
+        if not payment_data or not isinstance(payment_data, dict):
+            return JSONResponse({'error': 'No payment data provided'}, status_code=400)
+
+        order_id = payment_data.get('order_id')
+        amount = payment_data.get('amount')
+
+        if not order_id or not amount:
+            return JSONResponse({'error': 'order_id and amount are required'}, status_code=400)
+
+        payment_id = str(uuid.uuid4())
+        payment_status = 'completed'
+
+        print(f"Processing payment for order {order_id}, amount: {amount}")
+        print(f"Payment {payment_id} status: {payment_status}")
+
+        analytics_message = {
+            'payment_id': payment_id,
+            'order_id': order_id,
+            'amount': amount,
+            'status': payment_status,
+            'event_type': 'payment_processed',
+            'timestamp': str(uuid.uuid4())
+        }
+
+        success = await send_to_kafka('analytics_orders', analytics_message, order_id)
+
+        return JSONResponse({
+            'payment_id': payment_id,
+            'order_id': order_id,
+            'amount': amount,
+            'status': payment_status,
+            'message': 'Payment processed successfully' if success
+            else 'Payment processed but failed to send analytics data'
+        })
+
+    except Exception as e:
+        return JSONResponse({'error': str(e)}, status_code=500)
+
+
+async def health_check(request):
+    return JSONResponse({
+        'status': 'healthy',
+        'service': 'payment_service',
+        'mode': 'async',
+        'kafka': kafka_publisher.get_stats()
+    })
+
+
+app = Starlette(
+    routes=[
+        Route('/process_payment', process_payment, methods=['POST']),
+        Route('/health', health_check, methods=['GET']),
+    ],
+    on_startup=[kafka_publisher.start],
+    on_shutdown=[kafka_publisher.stop],
+)
@@ -0,0 +1,88 @@
+import argparse
+import json
+import time
+import uuid
+
+from kafka import KafkaProducer
+
+from producer import DURABILITY_MODES, KafkaEventPublisher
+
+
+def make_event(i):
+    return {
+        'payment_id': str(uuid.uuid4()),
+        'order_id': f"order-{i}",
+        'amount': 100 + i % 50,
+        'status': 'completed',
+        'event_type': 'payment_processed',
+        'timestamp': str(uuid.uuid4()),
+    }
+
+
+def base_config(args, durability):
+    config = {
+        'bootstrap_servers': args.bootstrap.split(','),
+        'linger_ms': args.linger_ms,
+        'batch_size': args.batch_size,
+        'compression_type': args.compression or None,
+    }
+    config.update(DURABILITY_MODES[durability])
+    return config
+
+
+def run_sync(args, durability):
+    producer = KafkaProducer(
+        value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+        key_serializer=lambda k: k.encode('utf-8') if k else None,
+        **base_config(args, durability)
+    )
+    started = time.perf_counter()
+    for i in range(args.messages):
+        event = make_event(i)
+        producer.send(args.topic, value=event, key=event['order_id'])
+        producer.flush()
+    elapsed = time.perf_counter() - started
+    producer.close()
+    return elapsed, {}
+
+
+def run_async(args, durability):
+    publisher = KafkaEventPublisher(base_config(args, durability))
+    started = time.perf_counter()
+    for i in range(args.messages):
+        event = make_event(i)
+        publisher.publish(args.topic, event, event['order_id'])
+    publisher.flush()
+    elapsed = time.perf_counter() - started
+    return elapsed, publisher.get_stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare per-message flush with batched async Kafka publishing')
+    parser.add_argument('--bootstrap', default='localhost:9093')
+    parser.add_argument('--topic', default='analytics_orders_bench')
+    parser.add_argument('--messages', type=int, default=10000)
+    parser.add_argument('--linger-ms', type=int, default=5)
+    parser.add_argument('--batch-size', type=int, default=65536)
+    parser.add_argument('--compression', default='gzip')
+    args = parser.parse_args()
+
+    results = []
+    for durability in DURABILITY_MODES:
+        for mode, runner in (('sync_flush', run_sync), ('async_batched', run_async)):
+            elapsed, stats = runner(args, durability)
+            results.append({
+                'mode': mode,
+                'durability': durability,
+                'messages': args.messages,
+                'seconds': round(elapsed, 3),
+                'messages_per_second': round(args.messages / elapsed, 1),
+                'publisher': stats,
+            })
+            print(f"{mode:14} {durability:8} {args.messages / elapsed:10.1f} msg/s")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
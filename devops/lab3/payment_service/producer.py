@@ -0,0 +1,227 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+from kafka import KafkaProducer
+
+from serialization import JsonSerializer
+
+DURABILITY_MODES = {
+    'durable': {
+        'acks': 'all',
+        'enable_idempotence': True,
+        'max_in_flight_requests_per_connection': 5,
+    },
+    'fast': {
+        'acks': 0,
+        'enable_idempotence': False,
+        'retries': 0,
+    },
+}
+
+
+def producer_config_from_env():
+    durability = os.getenv('KAFKA_DURABILITY', 'durable')
+    if durability not in DURABILITY_MODES:
+        raise ValueError(f"KAFKA_DURABILITY must be one of {', '.join(DURABILITY_MODES)}, got '{durability}'")
+
+    config = {
+        'bootstrap_servers': os.getenv('KAFKA_BROKER', 'kafka:9092').split(','),
+        'linger_ms': int(os.getenv('KAFKA_LINGER_MS', '5')),
+        'batch_size': int(os.getenv('KAFKA_BATCH_SIZE', '65536')),
+        'compression_type': os.getenv('KAFKA_COMPRESSION', 'gzip') or None,
+        'max_block_ms': int(os.getenv('KAFKA_MAX_BLOCK_MS', '1000')),
+    }
+    config.update(DURABILITY_MODES[durability])
+    return config
+
+
+def aiokafka_config(config):
+    # aiokafka has no retries/max_in_flight/max_block_ms knobs; it retries until request_timeout_ms instead.
+    return {
+        'bootstrap_servers': config['bootstrap_servers'],
+        'linger_ms': config['linger_ms'],
+        'max_batch_size': config['batch_size'],
+        'compression_type': config['compression_type'],
+        'acks': config['acks'],
+        'enable_idempotence': config['enable_idempotence'],
+    }
+
+
+class KafkaEventPublisher:
+    def __init__(self, config, max_retry_queue=10000, max_attempts=5, retry_interval=1.0, serializer=None):
+        self.config = config
+        self.serializer = serializer or JsonSerializer()
+        self._headers = [('content-type', self.serializer.content_type.encode('utf-8'))]
+        self.max_attempts = max_attempts
+        self.retry_interval = retry_interval
+        self.stats = {
+            'sent': 0,
+            'delivered': 0,
+            'failed': 0,
+            'retried': 0,
+            'dropped': 0,
+        }
+        self._retry_queue = deque(maxlen=max_retry_queue)
+        self._producer = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, topic, message, key=None, attempt=1):
+        try:
+            future = self._get_producer().send(topic, value=message, key=key, headers=self._headers)
+        except Exception as e:
+            self._on_error(e, topic, message, key, attempt)
+            return False
+
+        self.stats['sent'] += 1
+        future.add_callback(self._on_delivered)
+        future.add_errback(self._on_error, topic, message, key, attempt)
+        return True
+
+    def flush(self, timeout=None):
+        if self._producer is not None:
+            self._producer.flush(timeout)
+
+    def get_stats(self):
+        stats = dict(self.stats)
+        stats['retry_queue'] = len(self._retry_queue)
+        stats['acks'] = self.config.get('acks')
+        stats['content_type'] = self.serializer.content_type
+        return stats
+
+    def _get_producer(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._producer = KafkaProducer(
+                        value_serializer=self.serializer.dumps,
+                        key_serializer=lambda k: k.encode('utf-8') if k else None,
+                        **self.config
+                    )
+                    self._pid = os.getpid()
+                    threading.Thread(target=self._retry_loop, name='kafka-retry', daemon=True).start()
+        return self._producer
+
+    def _on_delivered(self, metadata):
+        self.stats['delivered'] += 1
+
+    def _on_error(self, error, topic, message, key, attempt):
+        self.stats['failed'] += 1
+        if attempt >= self.max_attempts:
+            self.stats['dropped'] += 1
+            print(f"Giving up on Kafka message after {attempt} attempts: {error}")
+            return
+        self._hold(topic, message, key, attempt + 1)
+
+    def _hold(self, topic, message, key, attempt):
+        if len(self._retry_queue) == self._retry_queue.maxlen:
+            self.stats['dropped'] += 1
+        self._retry_queue.append((topic, message, key, attempt))
+
+    def _retry_loop(self):
+        while True:
+            time.sleep(self.retry_interval)
+            for _ in range(len(self._retry_queue)):
+                try:
+                    topic, message, key, attempt = self._retry_queue.popleft()
+                except IndexError:
+                    break
+                self.stats['retried'] += 1
+                self.publish(topic, message, key, attempt)
+
+
+class AsyncKafkaEventPublisher(KafkaEventPublisher):
+    def __init__(self, config, max_connect_delay=30.0, **kwargs):
+        super().__init__(config, **kwargs)
+        self.max_connect_delay = max_connect_delay
+        self.stats['connect_failures'] = 0
+        self._retry_task = None
+        self._connect_task = None
+
+    async def start(self):
+        # Connecting happens in the background: a Kafka that is still starting must not fail the worker boot.
+        self._retry_task = asyncio.create_task(self._retry_loop())
+        self._connect_task = asyncio.create_task(self._connect())
+
+    async def stop(self):
+        for task in (self._connect_task, self._retry_task):
+            if task is not None:
+                task.cancel()
+        if self._producer is not None:
+            await self._producer.stop()
+
+    def get_stats(self):
+        stats = super().get_stats()
+        stats['connected'] = self._producer is not None
+        return stats
+
+    async def _connect(self):
+        from aiokafka import AIOKafkaProducer
+
+        delay = self.retry_interval
+        while True:
+            producer = AIOKafkaProducer(
+                value_serializer=self.serializer.dumps,
+                key_serializer=lambda k: k.encode('utf-8') if k else None,
+                **aiokafka_config(self.config)
+            )
+            try:
+                await producer.start()
+            except Exception as e:
+                self.stats['connect_failures'] += 1
+                print(f"Kafka not reachable yet, retrying in {delay:.1f}s: {e}")
+                try:
+                    await producer.stop()
+                except Exception:
+                    pass
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_connect_delay)
+                continue
+            self._producer = producer
+            print("Connected to Kafka")
+            return
+
+    async def publish(self, topic, message, key=None, attempt=1):
+        if self._producer is None:
+            # Held without spending an attempt; the retry loop sends it once the producer is connected.
+            self._hold(topic, message, key, attempt)
+            return False
+
+        try:
+            # Only waits for room in the batch accumulator; delivery is reported through the future.
+            future = await self._producer.send(topic, value=message, key=key, headers=self._headers)
+        except Exception as e:
+            self._on_error(e, topic, message, key, attempt)
+            return False
+
+        self.stats['sent'] += 1
+        future.add_done_callback(lambda f: self._on_result(f, topic, message, key, attempt))
+        return True
+
+    async def flush(self, timeout=None):
+        if self._producer is not None:
+            await asyncio.wait_for(self._producer.flush(), timeout)
+
+    def _on_result(self, future, topic, message, key, attempt):
+        if future.cancelled():
+            self._on_error(asyncio.CancelledError(), topic, message, key, attempt)
+        elif future.exception() is not None:
+            self._on_error(future.exception(), topic, message, key, attempt)
+        else:
+            self._on_delivered(future.result())
+
+    async def _retry_loop(self):
+        while True:
+            await asyncio.sleep(self.retry_interval)
+            if self._producer is None:
+                continue
+            for _ in range(len(self._retry_queue)):
+                try:
+                    topic, message, key, attempt = self._retry_queue.popleft()
+                except IndexError:
+                    break
+                self.stats['retried'] += 1
+                await self.publish(topic, message, key, attempt)
@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import uuid
+
+import aiohttp
+
+SHARED_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS = {
+    'order_service': ('GET', '/order_status/{order_id}', None),
+    'payment_service': ('POST', '/process_payment', lambda i: {'order_id': str(uuid.uuid4()), 'amount': 100 + i % 50}),
+}
+
+
+def start_server(args, mode):
+    env = dict(
+        os.environ,
+        SERVER_MODE=mode,
+        PORT=str(args.port),
+        GUNICORN_WORKERS=str(args.workers),
+        PYTHONPATH=SHARED_DIR,
+    )
+    command = [shutil.which('gunicorn') or 'gunicorn', '-c', os.path.join(SHARED_DIR, 'gunicorn.conf.py')]
+    cpus = {int(cpu) for cpu in args.cpus.split(',')}
+    # Pinning both modes to the same cores makes this a per-CPU comparison, not a per-worker one.
+    server = subprocess.Popen(
+        command,
+        cwd=os.path.join(SHARED_DIR, '..', args.service),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        preexec_fn=lambda: os.sched_setaffinity(0, cpus),
+    )
+    return server
+
+
+async def wait_until_ready(session, base_url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def prepare(session, base_url, service):
+    if service != 'order_service':
+        return []
+    order_ids = []
+    for _ in range(100):
+        async with session.post(f"{base_url}/create_order", json={'items': ['bench']}) as response:
+            order_ids.append((await response.json())['order_id'])
+    return order_ids
+
+
+async def load(args, base_url):
+    method, path, make_body = SCENARIOS[args.service]
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=args.concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await wait_until_ready(session, base_url)
+        order_ids = await prepare(session, base_url, args.service)
+        deadline = time.monotonic() + args.duration
+        counter = 0
+
+        async def worker():
+            nonlocal counter, errors
+            while time.monotonic() < deadline:
+                counter += 1
+                url = base_url + path.format(order_id=order_ids[counter % len(order_ids)] if order_ids else '')
+                started = time.perf_counter()
+                try:
+                    async with session.request(method, url, json=make_body(counter) if make_body else None) as response:
+                        await response.read()
+                        if response.status >= 400:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare sync (gthread) and async (uvicorn) serving at a fixed CPU budget')
+    parser.add_argument('--service', choices=sorted(SCENARIOS), default='payment_service')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--cpus', default='0', help='comma separated CPU ids the server is pinned to')
+    parser.add_argument('--concurrency', type=int, default=200)
+    parser.add_argument('--duration', type=float, default=15)
+    args = parser.parse_args()
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    results = []
+    for mode in ('sync', 'async'):
+        server = start_server(args, mode)
+        try:
+            result = asyncio.run(load(args, base_url))
+        finally:
+            server.terminate()
+            server.wait()
+        result.update({'service': args.service, 'mode': mode, 'workers': args.workers, 'cpus': args.cpus,
+                       'concurrency': args.concurrency})
+        results.append(result)
+        print(f"{mode:6} {result['requests_per_second']:10.1f} req/s  p50 {result['p50_ms']:8.2f} ms  "
+              f"p99 {result['p99_ms']:8.2f} ms  errors {result['errors']}", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
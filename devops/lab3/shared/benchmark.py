@@ -0,0 +1,76 @@
+import argparse
+import json
+import time
+import uuid
+
+from serialization import get_serializer, serializer_for
+
+
+def order_event(i):
+    return {
+        'order_id': str(uuid.uuid4()),
+        'event_type': 'order_created',
+    }
+
+
+def payment_event(i):
+    return {
+        'payment_id': str(uuid.uuid4()),
+        'order_id': str(uuid.uuid4()),
+        'amount': 100 + i % 50,
+        'status': 'completed',
+        'event_type': 'payment_processed',
+        'timestamp': str(uuid.uuid4()),
+    }
+
+
+EVENTS = {
+    'order_event.v2': order_event,
+    'payment_event.v2': payment_event,
+}
+
+
+def measure(serializer, events):
+    started = time.perf_counter()
+    encoded = [serializer.dumps(event) for event in events]
+    encode_seconds = time.perf_counter() - started
+
+    # Decode through content-type negotiation, exactly as the consumers do.
+    decoder = serializer_for(serializer.content_type)
+    started = time.perf_counter()
+    decoded = [decoder.loads(data) for data in encoded]
+    decode_seconds = time.perf_counter() - started
+
+    if decoded != events:
+        raise AssertionError(f"{serializer.content_type} did not round-trip the events")
+
+    count = len(events)
+    total_bytes = sum(len(data) for data in encoded)
+    return {
+        'content_type': serializer.content_type,
+        'bytes_per_event': round(total_bytes / count, 1),
+        'encode_us_per_event': round(encode_seconds / count * 1e6, 3),
+        'decode_us_per_event': round(decode_seconds / count * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare bytes on the wire and codec cost of event serializers')
+    parser.add_argument('--events', type=int, default=100000)
+    args = parser.parse_args()
+
+    results = []
+    for schema in EVENTS:
+        events = [EVENTS[schema](i) for i in range(args.events)]
+        for event_format in ('json', 'msgpack', 'schema'):
+            result = measure(get_serializer(event_format, schema), events)
+            result.update({'schema': schema, 'format': event_format, 'events': args.events})
+            results.append(result)
+            print(f"{schema:17} {event_format:8} {result['bytes_per_event']:7.1f} B "
+                  f"{result['encode_us_per_event']:7.3f} us enc {result['decode_us_per_event']:7.3f} us dec")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
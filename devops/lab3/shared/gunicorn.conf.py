@@ -0,0 +1,22 @@
+import multiprocessing
+import os
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'async')
+if SERVER_MODE not in ('sync', 'async'):
+    raise ValueError(f"SERVER_MODE must be 'sync' or 'async', got '{SERVER_MODE}'")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '10'))
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+
+if SERVER_MODE == 'async':
+    # One event loop per core: a worker waiting on Redis or Kafka keeps serving other requests.
+    wsgi_app = 'asgi:app'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'app:app'
+    worker_class = 'gthread'
+    threads = int(os.getenv('GUNICORN_THREADS', '8'))
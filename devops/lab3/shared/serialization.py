@@ -0,0 +1,162 @@
+import functools
+import json
+import os
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_CONTENT_TYPE = 'application/json'
+MSGPACK_CONTENT_TYPE = 'application/x-msgpack'
+# Extension type marking a schema field the message did not have, so an explicit null stays a null.
+MISSING_EXT_CODE = 0
+
+ORDER_EVENT_FIELDS = (
+    ('order_id', 'uuid'),
+    ('event_type', 'str'),
+)
+PAYMENT_EVENT_FIELDS = (
+    ('payment_id', 'uuid'),
+    ('order_id', 'uuid'),
+    ('amount', 'any'),
+    ('status', 'str'),
+    ('event_type', 'str'),
+    ('timestamp', 'uuid'),
+)
+
+# Field order is the wire format: append new fields, never reorder or remove, and bump the version to break it.
+SCHEMAS = {
+    'order_event.v1': ORDER_EVENT_FIELDS,
+    'order_event.v2': ORDER_EVENT_FIELDS,
+    'payment_event.v1': PAYMENT_EVENT_FIELDS,
+    'payment_event.v2': PAYMENT_EVENT_FIELDS,
+}
+# v1 wrote a missing field as nil, so it cannot tell a missing field from an explicit null.
+# It stays decodable for messages already in the queues and topics.
+NIL_MISSING_SCHEMAS = frozenset({'order_event.v1', 'payment_event.v1'})
+
+
+class DeserializationError(ValueError):
+    pass
+
+
+class JsonSerializer:
+    content_type = JSON_CONTENT_TYPE
+
+    def dumps(self, message):
+        return json.dumps(message, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class MsgpackSerializer:
+    content_type = MSGPACK_CONTENT_TYPE
+
+    def __init__(self):
+        if msgpack is None:
+            raise ValueError("MessagePack serialization requires the 'msgpack' package")
+
+    def dumps(self, message):
+        return msgpack.packb(message, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+class SchemaSerializer(MsgpackSerializer):
+    def __init__(self, schema):
+        super().__init__()
+        if schema not in SCHEMAS:
+            raise ValueError(f"Unknown event schema: {schema}")
+        self.schema = schema
+        self.fields = SCHEMAS[schema]
+        self.names = frozenset(name for name, _ in self.fields)
+        self.nil_missing = schema in NIL_MISSING_SCHEMAS
+        self.content_type = f"{MSGPACK_CONTENT_TYPE}; schema={schema}"
+
+    def dumps(self, message):
+        missing = None if self.nil_missing else msgpack.ExtType(MISSING_EXT_CODE, b'')
+        values = [encode_field(kind, message[name]) if name in message else missing for name, kind in self.fields]
+        extra = {key: value for key, value in message.items() if key not in self.names}
+        if extra:
+            # Fields the schema does not know yet travel as a trailing map instead of being lost.
+            values.append(extra)
+        return msgpack.packb(values, use_bin_type=True)
+
+    def loads(self, data):
+        values = msgpack.unpackb(data, raw=False)
+        message = {}
+        for (name, kind), value in zip(self.fields, values):
+            if isinstance(value, msgpack.ExtType) or (value is None and self.nil_missing):
+                continue
+            message[name] = decode_field(kind, value)
+        if len(values) > len(self.fields):
+            message.update(values[len(self.fields)])
+        return message
+
+
+def encode_field(kind, value):
+    # Only canonical lowercase UUIDs are packed to 16 bytes, so decoding always restores the exact string.
+    if kind == 'uuid' and isinstance(value, str) and len(value) == 36 and value == value.lower():
+        if value[8] == value[13] == value[18] == value[23] == '-':
+            try:
+                return bytes.fromhex(value.replace('-', ''))
+            except ValueError:
+                pass
+    return value
+
+
+def decode_field(kind, value):
+    if kind == 'uuid' and isinstance(value, bytes) and len(value) == 16:
+        h = value.hex()
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+    return value
+
+
+def get_serializer(event_format, schema=None):
+    if event_format == 'json':
+        return JsonSerializer()
+    if event_format == 'msgpack':
+        return MsgpackSerializer()
+    if event_format == 'schema':
+        return SchemaSerializer(schema)
+    raise ValueError(f"EVENT_FORMAT must be 'json', 'msgpack' or 'schema', got '{event_format}'")
+
+
+def serializer_from_env(schema):
+    return get_serializer(os.getenv('EVENT_FORMAT', 'json'), schema)
+
+
+@functools.lru_cache(maxsize=32)
+def serializer_for(content_type):
+    # Messages without a content type predate this layer and are always JSON.
+    if not content_type:
+        return JsonSerializer()
+
+    media_type, _, params = content_type.partition(';')
+    media_type = media_type.strip().lower()
+    if media_type in (JSON_CONTENT_TYPE, 'text/plain'):
+        return JsonSerializer()
+    if media_type == MSGPACK_CONTENT_TYPE:
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'schema':
+                return SchemaSerializer(value.strip())
+        return MsgpackSerializer()
+    raise ValueError(f"Unsupported content type: {content_type}")
+
+
+def loads(data, content_type=None):
+    try:
+        return serializer_for(content_type).loads(data)
+    except Exception as e:
+        raise DeserializationError(f"Cannot decode {content_type or JSON_CONTENT_TYPE} message: {e}") from e
+
+
+def header_content_type(headers):
+    for key, value in headers or ():
+        if key == 'content-type':
+            return value.decode('utf-8') if isinstance(value, bytes) else value
+    return None
@@ -1,9 +1,13 @@
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from datetime import datetime
+import base64
+import json
 import logging
 import os
 import sys
 
+from task_store import TASK_FIELDS, create_task_repository
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -17,8 +21,14 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 app.config['JSON_SORT_KEYS'] = False
 
-tasks = []
-request_count = 0
+tasks = create_task_repository()
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('TASKS_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.environ.get('TASKS_MAX_PAGE_SIZE', 1000))
+EXPORT_CHUNK_SIZE = 1000
+BULK_MAX_OPERATIONS = int(os.environ.get('TASKS_BULK_MAX_OPERATIONS', 1000))
+BULK_MODES = ('atomic', 'best_effort')
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
 
 logger.info('========== Aplikacja Task Manager uruchomiona ==========')
 
@@ -33,91 +43,179 @@ def health_check():
     }), 200
 
 
+def encode_cursor(after):
+    if isinstance(after, tuple):
+        payload = json.dumps(after, separators=(',', ':')).encode('utf-8')
+        return 't.' + base64.urlsafe_b64encode(payload).decode('ascii')
+    return str(after)
+
+
+def decode_cursor(cursor, by_title):
+    if not cursor:
+        return None
+    try:
+        if by_title:
+            if not cursor.startswith('t.'):
+                raise ValueError(cursor)
+            title, task_id = json.loads(base64.urlsafe_b64decode(cursor[2:].encode('ascii')))
+            return str(title), int(task_id)
+        return int(cursor)
+    except (ValueError, TypeError):
+        raise ValueError('after must be a next_cursor value returned by this endpoint')
+
+
+def parse_task_query(args):
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+
+    completed = args.get('completed')
+    if completed is not None:
+        if completed.lower() not in BOOLEAN_VALUES:
+            raise ValueError("completed must be 'true' or 'false'")
+        completed = BOOLEAN_VALUES[completed.lower()]
+
+    fields = None
+    if args.get('fields'):
+        fields = tuple(dict.fromkeys(field.strip() for field in args['fields'].split(',') if field.strip()))
+        unknown = [field for field in fields if field not in TASK_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    title_prefix = args.get('title_prefix') or None
+    return {
+        'limit': limit,
+        'after': decode_cursor(args.get('after'), title_prefix is not None),
+        'completed': completed,
+        'title_prefix': title_prefix,
+        'fields': fields
+    }
+
+
+def fetch_page(query, limit, after):
+    if query['title_prefix'] is not None:
+        return tasks.page_by_title(query['title_prefix'], limit, after, query['completed'])
+    return tasks.page(limit, after, query['completed'])
+
+
+def export_ndjson(query):
+    after = query['after']
+    while True:
+        page, after = fetch_page(query, EXPORT_CHUNK_SIZE, after)
+        if page:
+            yield ''.join(json.dumps(task.to_dict(query['fields']), ensure_ascii=False) + '\n' for task in page)
+        if after is None:
+            return
+
+
 @app.route('/api/tasks', methods=['GET'])
 def get_tasks():
-    global request_count
-    request_count += 1
+    request_count = tasks.count_request()
+
+    try:
+        query = parse_task_query(request.args)
+    except ValueError as e:
+        logger.warning(f'✗ GET /api/tasks - Błąd: {e} (Request #{request_count})')
+        return jsonify({'error': str(e)}), 400
+
+    if request.args.get('format') == 'ndjson':
+        logger.info(f'✓ GET /api/tasks - Eksport NDJSON (Request #{request_count})')
+        return Response(export_ndjson(query), mimetype='application/x-ndjson')
+
+    page, after = fetch_page(query, query['limit'], query['after'])
     logger.info(f'✓ GET /api/tasks - Request #{request_count}')
     return jsonify({
-        'tasks': tasks,
-        'count': len(tasks),
+        'tasks': [task.to_dict(query['fields']) for task in page],
+        'count': len(page),
+        'next_cursor': encode_cursor(after) if after is not None else None,
         'total_requests': request_count
     }), 200
 
 
+def validate_new_task(data):
+    if not isinstance(data, dict) or not isinstance(data.get('title'), str) or not data['title'].strip():
+        return 'Title is required and cannot be empty'
+    if not isinstance(data.get('description', ''), str):
+        return 'Description must be a string'
+    return None
+
+
+def validate_update(data):
+    if not isinstance(data, dict):
+        return 'Request body must be a JSON object'
+    for field in ('title', 'description'):
+        if field in data and not isinstance(data[field], str):
+            return f'{field.capitalize()} must be a string'
+    return None
+
+
 @app.route('/api/tasks', methods=['POST'])
 def create_task():
-    global request_count
-    request_count += 1
+    request_count = tasks.count_request()
     
     data = request.get_json()
     
-    if not data or 'title' not in data or not data['title'].strip():
-        logger.warning(f'✗ POST /api/tasks - Błąd: Brak tytułu (Request #{request_count})')
-        return jsonify({'error': 'Title is required and cannot be empty'}), 400
-    
-    task = {
-        'id': len(tasks) + 1,
-        'title': data['title'].strip(),
-        'description': data.get('description', '').strip(),
-        'completed': False,
-        'created_at': datetime.now().isoformat()
-    }
+    error = validate_new_task(data)
+    if error:
+        logger.warning(f'✗ POST /api/tasks - Błąd: {error} (Request #{request_count})')
+        return jsonify({'error': error}), 400
     
-    tasks.append(task)
-    logger.info(f'✓ POST /api/tasks - Utworzono zadanie #{task["id"]}: {task["title"]} (Request #{request_count})')
+    task = tasks.create(data['title'].strip(), data.get('description', '').strip())
+    logger.info(f'✓ POST /api/tasks - Utworzono zadanie #{task.id}: {task.title} (Request #{request_count})')
     
-    return jsonify(task), 201
+    return jsonify(task.to_dict()), 201
 
 
 @app.route('/api/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
-    global request_count
-    request_count += 1
+    request_count = tasks.count_request()
     
-    task = next((t for t in tasks if t['id'] == task_id), None)
+    task = tasks.get(task_id)
     
     if not task:
         logger.warning(f'✗ GET /api/tasks/{task_id} - Zadanie nie znalezione (Request #{request_count})')
         return jsonify({'error': 'Task not found'}), 404
     
-    logger.info(f'✓ GET /api/tasks/{task_id} - {task["title"]} (Request #{request_count})')
-    return jsonify(task), 200
+    logger.info(f'✓ GET /api/tasks/{task_id} - {task.title} (Request #{request_count})')
+    return jsonify(task.to_dict()), 200
 
 
 @app.route('/api/tasks/<int:task_id>', methods=['PUT'])
 def update_task(task_id):
-    global request_count
-    request_count += 1
+    request_count = tasks.count_request()
     
-    task = next((t for t in tasks if t['id'] == task_id), None)
-    
-    if not task:
+    if not tasks.get(task_id):
         logger.warning(f'✗ PUT /api/tasks/{task_id} - Zadanie nie znalezione (Request #{request_count})')
         return jsonify({'error': 'Task not found'}), 404
     
-    data = request.get_json()
-    if 'title' in data:
-        task['title'] = data['title'].strip()
-    if 'description' in data:
-        task['description'] = data['description'].strip()
-    if 'completed' in data:
-        task['completed'] = data['completed']
+    data = request.get_json(silent=True)
+    error = validate_update(data)
+    if error:
+        logger.warning(f'✗ PUT /api/tasks/{task_id} - Błąd: {error} (Request #{request_count})')
+        return jsonify({'error': error}), 400
+    
+    task = tasks.update(
+        task_id,
+        title=data['title'].strip() if 'title' in data else None,
+        description=data['description'].strip() if 'description' in data else None,
+        completed=data.get('completed')
+    )
+    if task is None:
+        logger.warning(f'✗ PUT /api/tasks/{task_id} - Zadanie nie znalezione (Request #{request_count})')
+        return jsonify({'error': 'Task not found'}), 404
     
     logger.info(f'✓ PUT /api/tasks/{task_id} - Zaktualizowano (Request #{request_count})')
-    return jsonify(task), 200
+    return jsonify(task.to_dict()), 200
 
 
 @app.route('/api/tasks/<int:task_id>', methods=['DELETE'])
 def delete_task(task_id):
-    global request_count
-    request_count += 1
-    
-    global tasks
-    original_count = len(tasks)
-    tasks = [t for t in tasks if t['id'] != task_id]
+    request_count = tasks.count_request()
     
-    if len(tasks) == original_count:
+    if not tasks.delete(task_id):
         logger.warning(f'✗ DELETE /api/tasks/{task_id} - Zadanie nie znalezione (Request #{request_count})')
         return jsonify({'error': 'Task not found'}), 404
     
@@ -125,14 +223,149 @@ def delete_task(task_id):
     return jsonify({'message': 'Task deleted successfully', 'id': task_id}), 200
 
 
+def parse_bulk_request(key):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get(key), list):
+        raise ValueError(f'{key} must be a list')
+    if len(data[key]) > BULK_MAX_OPERATIONS:
+        raise ValueError(f'At most {BULK_MAX_OPERATIONS} {key} per request')
+    mode = data.get('mode', 'atomic')
+    if mode not in BULK_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(BULK_MODES)}")
+    return data[key], mode
+
+
+def check_operation(operation, deleted):
+    if not isinstance(operation, dict):
+        return 400, 'Operation must be an object'
+    kind = operation.get('op', 'update')
+    if kind not in ('update', 'delete'):
+        return 400, "op must be 'update' or 'delete'"
+    task_id = operation.get('id')
+    if not isinstance(task_id, int) or isinstance(task_id, bool):
+        return 400, 'id must be an integer'
+    if task_id in deleted or not tasks.get(task_id):
+        return 404, 'Task not found'
+    if kind == 'update':
+        error = validate_update(operation)
+        if error:
+            return 400, error
+    else:
+        deleted.add(task_id)
+    return None
+
+
+def apply_operation(operation):
+    task_id = operation['id']
+    if operation.get('op', 'update') == 'delete':
+        tasks.delete(task_id)
+        return {'status': 200, 'id': task_id}
+    task = tasks.update(
+        task_id,
+        title=operation['title'].strip() if 'title' in operation else None,
+        description=operation['description'].strip() if 'description' in operation else None,
+        completed=operation.get('completed')
+    )
+    return {'status': 200, 'task': task.to_dict()}
+
+
+def bulk_response(endpoint, mode, errors, results, request_count):
+    if mode == 'atomic' and errors:
+        # Validation ran for the whole batch before anything was written, so nothing needs undoing.
+        results = [
+            {'index': i, 'status': errors[i][0], 'error': errors[i][1]} if i in errors
+            else {'index': i, 'status': 424, 'error': 'Not applied: another operation in the batch failed'}
+            for i in range(len(results))
+        ]
+        logger.warning(f'✗ {endpoint} - Odrzucono {len(errors)}/{len(results)} operacji (Request #{request_count})')
+        return jsonify({'mode': mode, 'applied': False, 'succeeded': 0, 'failed': len(results),
+                        'results': results, 'total_requests': request_count}), 400
+
+    logger.info(f'✓ {endpoint} - {len(results) - len(errors)}/{len(results)} operacji (Request #{request_count})')
+    return jsonify({
+        'mode': mode,
+        'applied': True,
+        'succeeded': len(results) - len(errors),
+        'failed': len(errors),
+        'results': results,
+        'total_requests': request_count
+    }), 207 if errors else 200
+
+
+@app.route('/api/tasks/bulk', methods=['POST'])
+def create_tasks_bulk():
+    request_count = tasks.count_request()
+    
+    try:
+        items, mode = parse_bulk_request('tasks')
+    except ValueError as e:
+        logger.warning(f'✗ POST /api/tasks/bulk - Błąd: {e} (Request #{request_count})')
+        return jsonify({'error': str(e)}), 400
+    
+    errors = {}
+    for i, item in enumerate(items):
+        error = validate_new_task(item)
+        if error:
+            errors[i] = (400, error)
+    
+    results = [None] * len(items)
+    if mode == 'best_effort' or not errors:
+        with tasks.transaction():
+            for i, item in enumerate(items):
+                if i in errors:
+                    results[i] = {'index': i, 'status': 400, 'error': errors[i][1]}
+                else:
+                    task = tasks.create(item['title'].strip(), item.get('description', '').strip())
+                    results[i] = {'index': i, 'status': 201, 'task': task.to_dict()}
+    
+    return bulk_response('POST /api/tasks/bulk', mode, errors, results, request_count)
+
+
+@app.route('/api/tasks/bulk', methods=['PATCH'])
+def update_tasks_bulk():
+    request_count = tasks.count_request()
+    
+    try:
+        operations, mode = parse_bulk_request('operations')
+    except ValueError as e:
+        logger.warning(f'✗ PATCH /api/tasks/bulk - Błąd: {e} (Request #{request_count})')
+        return jsonify({'error': str(e)}), 400
+    
+    errors = {}
+    results = [None] * len(operations)
+    if mode == 'atomic':
+        # Checks and writes share one transaction, so no other worker can change the batch's tasks in between.
+        with tasks.transaction():
+            deleted = set()
+            for i, operation in enumerate(operations):
+                error = check_operation(operation, deleted)
+                if error:
+                    errors[i] = error
+            if not errors:
+                for i, operation in enumerate(operations):
+                    results[i] = {'index': i, **apply_operation(operation)}
+    else:
+        for i, operation in enumerate(operations):
+            with tasks.transaction():
+                error = check_operation(operation, set())
+                if error:
+                    errors[i] = error
+                    results[i] = {'index': i, 'status': error[0], 'error': error[1]}
+                else:
+                    results[i] = {'index': i, **apply_operation(operation)}
+    
+    return bulk_response('PATCH /api/tasks/bulk', mode, errors, results, request_count)
+
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     logger.info('✓ GET /api/stats')
+    counts = tasks.counts()
     return jsonify({
-        'total_tasks': len(tasks),
-        'completed_tasks': len([t for t in tasks if t['completed']]),
-        'pending_tasks': len([t for t in tasks if not t['completed']]),
-        'total_requests': request_count
+        'total_tasks': counts['total'],
+        'completed_tasks': counts['completed'],
+        'pending_tasks': counts['pending'],
+        'total_requests': tasks.requests_served()
     }), 200
 
 
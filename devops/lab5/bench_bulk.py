@@ -0,0 +1,83 @@
+import argparse
+import json
+import logging
+import time
+
+from app import app, tasks
+
+
+def per_task_us(started, count):
+    return round((time.perf_counter() - started) / count * 1e6, 2)
+
+
+def run_single(client, count):
+    results = {}
+
+    started = time.perf_counter()
+    ids = [client.post('/api/tasks', json={'title': f'Task {i}'}).json['id'] for i in range(count)]
+    results['create_us'] = per_task_us(started, count)
+
+    started = time.perf_counter()
+    for task_id in ids:
+        client.put(f'/api/tasks/{task_id}', json={'completed': True})
+    results['update_us'] = per_task_us(started, count)
+
+    started = time.perf_counter()
+    for task_id in ids:
+        client.delete(f'/api/tasks/{task_id}')
+    results['delete_us'] = per_task_us(started, count)
+    return results
+
+
+def run_bulk(client, count, batch_size, mode):
+    results = {}
+    ids = []
+
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        payload = {'tasks': [{'title': f'Task {i}'} for i in range(start, min(start + batch_size, count))], 'mode': mode}
+        ids.extend(r['task']['id'] for r in client.post('/api/tasks/bulk', json=payload).json['results'])
+    results['create_us'] = per_task_us(started, count)
+
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        operations = [{'id': task_id, 'completed': True} for task_id in ids[start:start + batch_size]]
+        client.patch('/api/tasks/bulk', json={'operations': operations, 'mode': mode})
+    results['update_us'] = per_task_us(started, count)
+
+    started = time.perf_counter()
+    for start in range(0, count, batch_size):
+        operations = [{'op': 'delete', 'id': task_id} for task_id in ids[start:start + batch_size]]
+        client.patch('/api/tasks/bulk', json={'operations': operations, 'mode': mode})
+    results['delete_us'] = per_task_us(started, count)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-task cost of bulk endpoints against one request per task')
+    parser.add_argument('--tasks', type=int, default=5000)
+    parser.add_argument('--batch-sizes', default='10,100,1000')
+    parser.add_argument('--quiet-logs', action='store_true', help='drop per-request log lines to isolate HTTP cost')
+    args = parser.parse_args()
+
+    if args.quiet_logs:
+        logging.getLogger('app').setLevel(logging.WARNING)
+
+    app.config['TESTING'] = True
+    results = []
+    with app.test_client() as client:
+        runs = [('single', 1, None)] + [('bulk', int(size), mode) for size in args.batch_sizes.split(',')
+                                         for mode in ('atomic', 'best_effort')]
+        for kind, batch_size, mode in runs:
+            tasks.clear()
+            result = run_single(client, args.tasks) if kind == 'single' else run_bulk(client, args.tasks, batch_size, mode)
+            result.update({'kind': kind, 'batch_size': batch_size, 'mode': mode, 'tasks': args.tasks})
+            results.append(result)
+            print(f"{kind:6} {batch_size:5} {mode or '-':11} create {result['create_us']:8.2f} us  "
+                  f"update {result['update_us']:8.2f} us  delete {result['delete_us']:8.2f} us per task")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
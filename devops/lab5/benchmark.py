@@ -0,0 +1,105 @@
+import argparse
+import json
+import tempfile
+import time
+from datetime import datetime
+
+from task_store import SQLiteTaskRepository, TaskRepository
+
+
+class ListTaskStore:
+    """The original list-of-dicts storage, kept here only as the baseline."""
+
+    def __init__(self):
+        self.tasks = []
+
+    def create(self, title, description=''):
+        task = {
+            'id': len(self.tasks) + 1,
+            'title': title,
+            'description': description,
+            'completed': False,
+            'created_at': datetime.now().isoformat()
+        }
+        self.tasks.append(task)
+        return task
+
+    def get(self, task_id):
+        return next((t for t in self.tasks if t['id'] == task_id), None)
+
+    def update(self, task_id, completed=None):
+        task = self.get(task_id)
+        if task is not None and completed is not None:
+            task['completed'] = completed
+        return task
+
+    def delete(self, task_id):
+        original_count = len(self.tasks)
+        self.tasks = [t for t in self.tasks if t['id'] != task_id]
+        return len(self.tasks) != original_count
+
+
+def per_op_us(fn, ids):
+    started = time.perf_counter()
+    for task_id in ids:
+        fn(task_id)
+    return round((time.perf_counter() - started) / len(ids) * 1e6, 3)
+
+
+def measure(store_class, size, ops):
+    store = store_class()
+    for i in range(size):
+        store.create(f'Task {i}', 'bench')
+
+    # Spread the probes across the store so the list baseline is not flattered by early hits.
+    step = max(1, size // ops)
+    ids = list(range(1, size + 1, step))[:ops]
+    return {
+        'create_us': per_op_us(lambda _: store.create('New task', 'bench'), ids),
+        'get_us': per_op_us(store.get, ids),
+        # A second pass over the same ids is what the per-worker cache is for.
+        'get_again_us': per_op_us(store.get, ids),
+        'update_us': per_op_us(lambda task_id: store.update(task_id, completed=True), ids),
+        'delete_us': per_op_us(store.delete, ids),
+    }
+
+
+def sqlite_store(directory, cache_size):
+    def create():
+        path = tempfile.mktemp(suffix='.db', dir=directory)
+        return SQLiteTaskRepository(path, cache_size)
+    return create
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-operation cost of task storage against the number of tasks')
+    parser.add_argument('--sizes', default='1000,10000,100000,300000')
+    parser.add_argument('--ops', type=int, default=200)
+    parser.add_argument('--list-max-size', type=int, default=100000,
+                        help='skip the list baseline above this size, it is quadratic to measure')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        stores = (
+            ('dict_repository', TaskRepository),
+            ('list', ListTaskStore),
+            ('sqlite', sqlite_store(directory, 0)),
+            ('sqlite_cached', sqlite_store(directory, 10000)),
+        )
+        for size in (int(value) for value in args.sizes.split(',')):
+            for name, store_class in stores:
+                if store_class is ListTaskStore and size > args.list_max_size:
+                    continue
+                result = measure(store_class, size, args.ops)
+                result.update({'store': name, 'tasks': size})
+                results.append(result)
+                print(f"{name:16} {size:8} create {result['create_us']:9.3f} us  get {result['get_us']:9.3f} us  "
+                      f"get again {result['get_again_us']:9.3f} us  update {result['update_us']:9.3f} us  "
+                      f"delete {result['delete_us']:9.3f} us")
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,558 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+TASK_FIELDS = ('id', 'title', 'description', 'completed', 'created_at')
+
+# task_state is a single row the triggers keep current: counts for /api/stats and a version
+# that moves on every committed write, which is what tells other workers their cache is stale.
+# It also holds the request counter every worker adds its batched counts to, so total_requests is service-wide.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    title_key TEXT NOT NULL,
+    description TEXT NOT NULL,
+    completed TEXT NOT NULL,
+    done INTEGER NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_done ON tasks (done, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_title ON tasks (title_key, id);
+CREATE TABLE IF NOT EXISTS task_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    requests INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO task_state (id, total, completed, version) VALUES (1, 0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS tasks_after_insert AFTER INSERT ON tasks BEGIN
+    UPDATE task_state SET total = total + 1, completed = completed + NEW.done, version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_after_update AFTER UPDATE ON tasks BEGIN
+    UPDATE task_state SET completed = completed + NEW.done - OLD.done, version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_after_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_state SET total = total - 1, completed = completed - OLD.done, version = version + 1 WHERE id = 1;
+END;
+"""
+TASK_COLUMNS = 'id, title, description, completed, created_at'
+
+
+class Task:
+    __slots__ = TASK_FIELDS
+
+    def __init__(self, id, title, description='', completed=False, created_at=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.completed = completed
+        self.created_at = created_at or datetime.now().isoformat()
+
+    def to_dict(self, fields=None):
+        if fields is not None:
+            return {field: getattr(self, field) for field in fields}
+        return {
+            'id': self.id,
+            'title': self.title,
+            'description': self.description,
+            'completed': self.completed,
+            'created_at': self.created_at
+        }
+
+
+class SortedIndex:
+    # A list of sorted buckets: inserts and removes shift one small bucket instead of the whole index.
+    BUCKET_SIZE = 512
+
+    def __init__(self):
+        self._buckets = []
+        self._maxes = []
+        self._len = 0
+
+    def add(self, key):
+        if not self._buckets:
+            self._buckets.append([key])
+            self._maxes.append(key)
+        else:
+            b = bisect_left(self._maxes, key)
+            if b == len(self._maxes):
+                b -= 1
+                self._buckets[b].append(key)
+                self._maxes[b] = key
+            else:
+                insort(self._buckets[b], key)
+            bucket = self._buckets[b]
+            if len(bucket) > 2 * self.BUCKET_SIZE:
+                half = self.BUCKET_SIZE
+                self._buckets[b:b + 1] = [bucket[:half], bucket[half:]]
+                self._maxes[b:b + 1] = [bucket[half - 1], bucket[-1]]
+        self._len += 1
+
+    def remove(self, key):
+        b = bisect_left(self._maxes, key)
+        if b == len(self._maxes):
+            return
+        bucket = self._buckets[b]
+        i = bisect_left(bucket, key)
+        if i == len(bucket) or bucket[i] != key:
+            return
+        del bucket[i]
+        self._len -= 1
+        if not bucket:
+            del self._buckets[b]
+            del self._maxes[b]
+        elif i == len(bucket):
+            self._maxes[b] = bucket[-1]
+
+    def iter_from(self, key=None, exclusive=False):
+        if key is None:
+            b, i = 0, 0
+        else:
+            find = bisect_right if exclusive else bisect_left
+            b = find(self._maxes, key)
+            i = find(self._buckets[b], key) if b < len(self._buckets) else 0
+        for bucket in self._buckets[b:]:
+            yield from bucket[i:]
+            i = 0
+
+    def __len__(self):
+        return self._len
+
+
+class TaskRepository:
+    """In-memory tasks for a single process; one lock serialises writers and index walks."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._requests = 0
+        self._requests_lock = threading.Lock()
+        self.clear()
+
+    def count_request(self):
+        with self._requests_lock:
+            self._requests += 1
+            return self._requests
+
+    def requests_served(self):
+        return self._requests
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield
+
+    def clear(self):
+        with self._lock:
+            self._tasks = {}
+            self._next_id = 1
+            self._ids = SortedIndex()
+            self._by_completed = {True: SortedIndex(), False: SortedIndex()}
+            self._by_title = SortedIndex()
+
+    def create(self, title, description=''):
+        with self._lock:
+            task = Task(self._next_id, title, description)
+            self._next_id += 1
+            self._tasks[task.id] = task
+            self._ids.add(task.id)
+            self._by_completed[False].add(task.id)
+            self._by_title.add((title_key(title), task.id))
+            return task
+
+    def get(self, task_id):
+        return self._tasks.get(task_id)
+
+    def update(self, task_id, title=None, description=None, completed=None):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            if title is not None:
+                self._by_title.remove((title_key(task.title), task_id))
+                task.title = title
+                self._by_title.add((title_key(title), task_id))
+            if description is not None:
+                task.description = description
+            if completed is not None:
+                was_completed = bool(task.completed)
+                task.completed = completed
+                if bool(completed) != was_completed:
+                    self._by_completed[was_completed].remove(task_id)
+                    self._by_completed[bool(completed)].add(task_id)
+            return task
+
+    def delete(self, task_id):
+        with self._lock:
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return False
+            self._ids.remove(task_id)
+            self._by_completed[bool(task.completed)].remove(task_id)
+            self._by_title.remove((title_key(task.title), task_id))
+            return True
+
+    def counts(self):
+        # The completion index is kept current on every write, so stats never need a scan.
+        with self._lock:
+            completed = len(self._by_completed[True])
+            total = len(self._tasks)
+        return {
+            'total': total,
+            'completed': completed,
+            'pending': total - completed
+        }
+
+    def filter_by_completed(self, completed):
+        with self._lock:
+            return [self._tasks[task_id] for task_id in self._by_completed[bool(completed)].iter_from()]
+
+    def page(self, limit, after=None, completed=None):
+        with self._lock:
+            index = self._ids if completed is None else self._by_completed[bool(completed)]
+            ids = list(islice(index.iter_from(after, exclusive=True), limit + 1))
+            tasks = [self._tasks[task_id] for task_id in ids[:limit]]
+        return tasks, tasks[-1].id if len(ids) > limit else None
+
+    def page_by_title(self, prefix, limit, after=None, completed=None):
+        # Titles sharing a prefix are one contiguous run of the index; `after` is the last (title_key, id) seen.
+        prefix = title_key(prefix)
+        with self._lock:
+            if after is None:
+                keys = self._by_title.iter_from((prefix,))
+            else:
+                keys = self._by_title.iter_from(after, exclusive=True)
+            tasks = []
+            for key, task_id in keys:
+                if not key.startswith(prefix):
+                    break
+                task = self._tasks[task_id]
+                if completed is None or bool(task.completed) == bool(completed):
+                    if len(tasks) == limit:
+                        last = tasks[-1]
+                        return tasks, (title_key(last.title), last.id)
+                    tasks.append(task)
+        return tasks, None
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._tasks.values()))
+
+
+class LRUCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)
+
+
+class SQLiteTaskRepository:
+    """Tasks in one SQLite file in WAL mode, shared by every worker and thread that opens it.
+
+    Each worker keeps an LRU of tasks read by id, tagged with the task_state version it was
+    filled at. A read first checks that version and drops the cache if any worker has committed
+    since, so a worker never serves a task another one has changed or deleted.
+    """
+
+    def __init__(self, path, cache_size=10000, request_flush_every=100, request_flush_interval=1.0):
+        self.path = path
+        self.cache = LRUCache(cache_size)
+        self.request_flush_every = request_flush_every
+        self.request_flush_interval = request_flush_interval
+        self._cache_version = None
+        self._cache_lock = threading.Lock()
+        self._local = threading.local()
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(task_state)')}
+        if 'requests' not in columns:
+            connection.execute('ALTER TABLE task_state ADD COLUMN requests INTEGER NOT NULL DEFAULT 0')
+        self._requests_pending = 0
+        self._requests_total = connection.execute('SELECT requests FROM task_state WHERE id = 1').fetchone()[0]
+        self._requests_flushed_at = time.monotonic()
+        self._requests_lock = threading.Lock()
+        atexit.register(self.flush_requests)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Every statement is a constant string, so the connection's statement cache keeps them prepared.
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=64)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+            self._local.touched = set()
+        return connection
+
+    def _version(self, connection):
+        return connection.execute('SELECT version FROM task_state WHERE id = 1').fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        connection = self._connection()
+        if connection.in_transaction:
+            yield
+            return
+
+        # IMMEDIATE takes the write lock up front, so nothing commits between `before` and our own commit.
+        connection.execute('BEGIN IMMEDIATE')
+        self._local.touched = set()
+        try:
+            before = self._version(connection)
+            yield
+            after = self._version(connection)
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        touched, self._local.touched = self._local.touched, set()
+        with self._cache_lock:
+            if self._cache_version == before and touched is not None:
+                for task_id in touched:
+                    self.cache.delete(task_id)
+            else:
+                self.cache.clear()
+            self._cache_version = after
+
+    def count_request(self):
+        # Counted in memory and added to the shared row in batches, so a plain read never takes the write lock.
+        # The returned number is the total as of this worker's last flush plus what it has counted since.
+        with self._requests_lock:
+            self._requests_pending += 1
+            count = self._requests_total + self._requests_pending
+            due = (self._requests_pending >= self.request_flush_every or
+                   time.monotonic() - self._requests_flushed_at >= self.request_flush_interval)
+        if due:
+            self.flush_requests()
+        return count
+
+    def requests_served(self):
+        # Other workers' unflushed requests show up within one flush interval.
+        total = self._connection().execute('SELECT requests FROM task_state WHERE id = 1').fetchone()[0]
+        with self._requests_lock:
+            return total + self._requests_pending
+
+    def flush_requests(self):
+        with self._requests_lock:
+            pending, self._requests_pending = self._requests_pending, 0
+            self._requests_flushed_at = time.monotonic()
+        try:
+            total = self._connection().execute(
+                'UPDATE task_state SET requests = requests + ? WHERE id = 1 RETURNING requests', (pending,)
+            ).fetchone()[0]
+        except sqlite3.Error:
+            # The counter is best effort: a busy or missing database must not fail the request that flushes it.
+            with self._requests_lock:
+                self._requests_pending += pending
+            return
+        with self._requests_lock:
+            self._requests_total = total
+
+    def _touch(self, task_id):
+        # None means the transaction rewrote the whole table and the cache is dropped on commit anyway.
+        if self._local.touched is not None:
+            self._local.touched.add(task_id)
+
+    def clear(self):
+        with self.transaction():
+            connection = self._connection()
+            connection.execute('DELETE FROM tasks')
+            connection.execute("DELETE FROM sqlite_sequence WHERE name = 'tasks'")
+            self._local.touched = None
+
+    def create(self, title, description=''):
+        task = Task(None, title, description)
+        with self.transaction():
+            task.id = self._connection().execute(
+                'INSERT INTO tasks (title, title_key, description, completed, done, created_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (task.title, title_key(task.title), task.description, json.dumps(task.completed),
+                 int(bool(task.completed)), task.created_at)
+            ).lastrowid
+        return task
+
+    def get(self, task_id):
+        connection = self._connection()
+        if self.cache.max_size <= 0 or connection.in_transaction:
+            # Rows read inside a transaction may still be rolled back, so they never reach the cache.
+            return self._select(connection, task_id)
+
+        version = self._version(connection)
+        with self._cache_lock:
+            if version != self._cache_version:
+                self.cache.clear()
+                self._cache_version = version
+        task = self.cache.get(task_id)
+        if task is None:
+            task = self._select(connection, task_id)
+            if task is not None:
+                with self._cache_lock:
+                    if self._cache_version == version:
+                        self.cache.put(task_id, task)
+        return task
+
+    def _select(self, connection, task_id):
+        row = connection.execute(f'SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        return from_row(row) if row else None
+
+    def update(self, task_id, title=None, description=None, completed=None):
+        with self.transaction():
+            connection = self._connection()
+            task = self._select(connection, task_id)
+            if task is None:
+                return None
+            if title is not None:
+                task.title = title
+            if description is not None:
+                task.description = description
+            if completed is not None:
+                task.completed = completed
+            connection.execute(
+                'UPDATE tasks SET title = ?, title_key = ?, description = ?, completed = ?, done = ? WHERE id = ?',
+                (task.title, title_key(task.title), task.description, json.dumps(task.completed),
+                 int(bool(task.completed)), task_id)
+            )
+            self._touch(task_id)
+        return task
+
+    def delete(self, task_id):
+        with self.transaction():
+            deleted = self._connection().execute('DELETE FROM tasks WHERE id = ?', (task_id,)).rowcount > 0
+            if deleted:
+                self._touch(task_id)
+        return deleted
+
+    def counts(self):
+        # Triggers keep task_state in step with every write, so stats never need a scan.
+        total, completed = self._connection().execute(
+            'SELECT total, completed FROM task_state WHERE id = 1'
+        ).fetchone()
+        return {
+            'total': total,
+            'completed': completed,
+            'pending': total - completed
+        }
+
+    def filter_by_completed(self, completed):
+        rows = self._connection().execute(
+            f'SELECT {TASK_COLUMNS} FROM tasks WHERE done = ? ORDER BY id',
+            (int(bool(completed)),)
+        )
+        return [from_row(row) for row in rows]
+
+    def page(self, limit, after=None, completed=None):
+        connection = self._connection()
+        if completed is None:
+            rows = connection.execute(
+                f'SELECT {TASK_COLUMNS} FROM tasks WHERE id > ? ORDER BY id LIMIT ?',
+                (after or 0, limit + 1)
+            ).fetchall()
+        else:
+            rows = connection.execute(
+                f'SELECT {TASK_COLUMNS} FROM tasks WHERE done = ? AND id > ? ORDER BY id LIMIT ?',
+                (int(bool(completed)), after or 0, limit + 1)
+            ).fetchall()
+        tasks = [from_row(row) for row in rows[:limit]]
+        return tasks, tasks[-1].id if len(rows) > limit else None
+
+    def page_by_title(self, prefix, limit, after=None, completed=None):
+        # Same contiguous run as the in-memory index, read as a range scan of idx_tasks_title.
+        prefix = title_key(prefix)
+        conditions = ['title_key >= ?']
+        params = [prefix]
+        upper = prefix_upper_bound(prefix)
+        if upper is not None:
+            conditions.append('title_key < ?')
+            params.append(upper)
+        if after is not None:
+            conditions.append('(title_key, id) > (?, ?)')
+            params.extend(after)
+        if completed is not None:
+            conditions.append('done = ?')
+            params.append(int(bool(completed)))
+        params.append(limit + 1)
+        rows = self._connection().execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks WHERE {' AND '.join(conditions)} ORDER BY title_key, id LIMIT ?",
+            params
+        ).fetchall()
+        tasks = [from_row(row) for row in rows[:limit]]
+        if len(rows) > limit:
+            last = tasks[-1]
+            return tasks, (title_key(last.title), last.id)
+        return tasks, None
+
+    def __len__(self):
+        return self.counts()['total']
+
+    def __iter__(self):
+        rows = self._connection().execute(f'SELECT {TASK_COLUMNS} FROM tasks ORDER BY id').fetchall()
+        return (from_row(row) for row in rows)
+
+
+def from_row(row):
+    task_id, title, description, completed, created_at = row
+    return Task(task_id, title, description, json.loads(completed), created_at)
+
+
+def prefix_upper_bound(prefix):
+    # The smallest string greater than every string starting with `prefix`; None when there is none.
+    prefix = prefix.rstrip(chr(0x10FFFF))
+    if not prefix:
+        return None
+    following = ord(prefix[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        following = 0xE000
+    return prefix[:-1] + chr(following)
+
+
+def create_task_repository():
+    backend = os.getenv('TASKS_STORE', 'memory')
+    if backend == 'memory':
+        return TaskRepository()
+    if backend == 'sqlite':
+        return SQLiteTaskRepository(os.getenv('TASKS_DB_PATH', 'tasks.db'), int(os.getenv('TASKS_CACHE_SIZE', '10000')))
+    raise ValueError(f"TASKS_STORE must be 'memory' or 'sqlite', got '{backend}'")
+
+
+def title_key(title):
+    return title.casefold()
@@ -1,13 +1,18 @@
 import pytest
 import json
-from app import app, tasks
+import random
+import app as app_module
+from app import app
+from task_store import SQLiteTaskRepository, SortedIndex, TaskRepository
 
 
-@pytest.fixture
-def client():
+@pytest.fixture(params=['memory', 'sqlite'])
+def client(request, tmp_path, monkeypatch):
     app.config['TESTING'] = True
+    if request.param == 'sqlite':
+        monkeypatch.setattr(app_module, 'tasks', SQLiteTaskRepository(str(tmp_path / 'tasks.db')))
     with app.test_client() as client:
-        tasks.clear()
+        app_module.tasks.clear()
         yield client
 
 
@@ -74,6 +79,15 @@ class TestTasksCRUD:
         assert response.json['title'] == 'Nowe zadanie'
         assert response.json['completed'] == True
     
+    @pytest.mark.parametrize('payload', [None, [], {'title': 5}, {'description': ['x']}])
+    def test_update_task_rejects_what_bulk_update_rejects(self, client, payload):
+        client.post('/api/tasks', json={'title': 'Stare zadanie'})
+        
+        response = client.put('/api/tasks/1', json=payload)
+        assert response.status_code == 400
+        assert 'error' in response.json
+        assert client.get('/api/tasks/1').json['title'] == 'Stare zadanie'
+    
     def test_update_nonexistent_task(self, client):
         response = client.put('/api/tasks/999', json={'title': 'Test'})
         assert response.status_code == 404
@@ -90,6 +104,15 @@ class TestTasksCRUD:
     def test_delete_nonexistent_task(self, client):
         response = client.delete('/api/tasks/999')
         assert response.status_code == 404
+    
+    def test_ids_not_reused_after_delete(self, client):
+        client.post('/api/tasks', json={'title': 'Task 1'})
+        client.post('/api/tasks', json={'title': 'Task 2'})
+        client.delete('/api/tasks/1')
+        
+        response = client.post('/api/tasks', json={'title': 'Task 3'})
+        assert response.json['id'] == 3
+        assert client.get('/api/tasks/2').json['title'] == 'Task 2'
 
 
 class TestStats:
@@ -104,6 +127,288 @@ class TestStats:
         assert response.json['total_tasks'] == 2
         assert response.json['completed_tasks'] == 1
         assert response.json['pending_tasks'] == 1
+    
+    def test_stats_report_requests_counted_by_handlers(self, client):
+        first = client.get('/api/tasks').json['total_requests']
+        client.post('/api/tasks', json={'title': 'Task 1'})
+        assert client.get('/api/tasks').json['total_requests'] == first + 2
+        assert client.get('/api/stats').json['total_requests'] == first + 2
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_stats_match_full_recount_after_random_operations(self, client, seed):
+        rng = random.Random(seed)
+        for _ in range(300):
+            ids = [t['id'] for t in client.get('/api/tasks?limit=1000').json['tasks']]
+            operation = rng.choice(['create', 'create', 'update', 'update', 'delete']) if ids else 'create'
+            if operation == 'create':
+                client.post('/api/tasks', json={'title': f'Task {rng.random()}'})
+            elif operation == 'update':
+                client.put(f'/api/tasks/{rng.choice(ids)}', json={'completed': rng.choice([True, False, 1, 0])})
+            else:
+                client.delete(f'/api/tasks/{rng.choice(ids + [999999])}')
+            
+            listed = client.get('/api/tasks?limit=1000').json['tasks']
+            stats = client.get('/api/stats').json
+            assert stats['total_tasks'] == len(listed)
+            assert stats['completed_tasks'] == len([t for t in listed if t['completed']])
+            assert stats['pending_tasks'] == len([t for t in listed if not t['completed']])
+
+
+class TestTaskListing:
+    def test_cursor_pagination_visits_every_task_once(self, client):
+        for i in range(25):
+            client.post('/api/tasks', json={'title': f'Task {i}'})
+        client.delete('/api/tasks/5')
+        
+        seen = []
+        url = '/api/tasks?limit=10'
+        while True:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(t['id'] for t in response.json['tasks'])
+            if response.json['next_cursor'] is None:
+                break
+            url = f"/api/tasks?limit=10&after={response.json['next_cursor']}"
+        assert seen == [i for i in range(1, 26) if i != 5]
+    
+    def test_filter_by_completed(self, client):
+        for i in range(6):
+            client.post('/api/tasks', json={'title': f'Task {i}'})
+        client.put('/api/tasks/4', json={'completed': True})
+        client.put('/api/tasks/2', json={'completed': True})
+        
+        response = client.get('/api/tasks?completed=true')
+        assert [t['id'] for t in response.json['tasks']] == [2, 4]
+        response = client.get('/api/tasks?completed=false&limit=2')
+        assert [t['id'] for t in response.json['tasks']] == [1, 3]
+        assert response.json['next_cursor'] == '3'
+    
+    def test_title_prefix_search_with_cursor(self, client):
+        for title in ['Deploy app', 'deploy db', 'Review', 'Deploy cache', 'Design']:
+            client.post('/api/tasks', json={'title': title})
+        
+        response = client.get('/api/tasks?title_prefix=DEPLOY&limit=2')
+        assert [t['title'] for t in response.json['tasks']] == ['Deploy app', 'Deploy cache']
+        
+        cursor = response.json['next_cursor']
+        response = client.get(f'/api/tasks?title_prefix=DEPLOY&limit=2&after={cursor}')
+        assert [t['title'] for t in response.json['tasks']] == ['deploy db']
+        assert response.json['next_cursor'] is None
+    
+    def test_field_projection(self, client):
+        client.post('/api/tasks', json={'title': 'Task'})
+        response = client.get('/api/tasks?fields=id,title')
+        assert response.json['tasks'] == [{'id': 1, 'title': 'Task'}]
+    
+    def test_ndjson_export_streams_all_matching_tasks(self, client):
+        for i in range(5):
+            client.post('/api/tasks', json={'title': f'Task {i}'})
+        client.put('/api/tasks/3', json={'completed': True})
+        
+        response = client.get('/api/tasks?format=ndjson&completed=false&fields=id')
+        assert response.mimetype == 'application/x-ndjson'
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == [{'id': 1}, {'id': 2}, {'id': 4}, {'id': 5}]
+    
+    @pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'completed=maybe', 'fields=secret', 'after=xyz'])
+    def test_invalid_query_parameters(self, client, query):
+        response = client.get(f'/api/tasks?{query}')
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+
+class TestBulkOperations:
+    def test_bulk_create(self, client):
+        payload = {'tasks': [{'title': 'Task 1'}, {'title': ' Task 2 ', 'description': 'Opis'}]}
+        response = client.post('/api/tasks/bulk', json=payload)
+        assert response.status_code == 200
+        assert response.json['succeeded'] == 2
+        assert [r['task']['id'] for r in response.json['results']] == [1, 2]
+        assert client.get('/api/tasks/2').json['title'] == 'Task 2'
+    
+    def test_bulk_create_atomic_applies_nothing_on_error(self, client):
+        payload = {'tasks': [{'title': 'Task 1'}, {'title': '  '}], 'mode': 'atomic'}
+        response = client.post('/api/tasks/bulk', json=payload)
+        assert response.status_code == 400
+        assert response.json['applied'] == False
+        assert [r['status'] for r in response.json['results']] == [424, 400]
+        assert client.get('/api/stats').json['total_tasks'] == 0
+    
+    def test_bulk_create_best_effort_reports_per_item(self, client):
+        payload = {'tasks': [{'title': 'Task 1'}, {'description': 'Bez tytułu'}, {'title': 'Task 3'}],
+                   'mode': 'best_effort'}
+        response = client.post('/api/tasks/bulk', json=payload)
+        assert response.status_code == 207
+        assert [r['status'] for r in response.json['results']] == [201, 400, 201]
+        assert client.get('/api/stats').json['total_tasks'] == 2
+    
+    def test_bulk_update_and_delete(self, client):
+        client.post('/api/tasks/bulk', json={'tasks': [{'title': f'Task {i}'} for i in range(3)]})
+        operations = [
+            {'id': 1, 'completed': True},
+            {'id': 2, 'title': 'Renamed'},
+            {'op': 'delete', 'id': 3}
+        ]
+        response = client.patch('/api/tasks/bulk', json={'operations': operations})
+        assert response.status_code == 200
+        assert client.get('/api/tasks/1').json['completed'] == True
+        assert client.get('/api/tasks/2').json['title'] == 'Renamed'
+        assert client.get('/api/tasks/3').status_code == 404
+    
+    def test_bulk_update_atomic_sees_earlier_deletes(self, client):
+        client.post('/api/tasks', json={'title': 'Task 1'})
+        operations = [{'op': 'delete', 'id': 1}, {'id': 1, 'completed': True}]
+        response = client.patch('/api/tasks/bulk', json={'operations': operations, 'mode': 'atomic'})
+        assert response.status_code == 400
+        assert [r['status'] for r in response.json['results']] == [424, 404]
+        assert client.get('/api/tasks/1').status_code == 200
+    
+    @pytest.mark.parametrize('payload', [{}, {'tasks': 'x'}, {'tasks': [], 'mode': 'sometimes'}])
+    def test_bulk_invalid_request(self, client, payload):
+        response = client.post('/api/tasks/bulk', json=payload)
+        assert response.status_code == 400
+        assert 'error' in response.json
+
+
+class TestTaskRepository:
+    def test_completed_index_follows_updates_and_deletes(self):
+        repository = TaskRepository()
+        first = repository.create('Task 1')
+        second = repository.create('Task 2')
+        
+        repository.update(first.id, completed=True)
+        assert [t.id for t in repository.filter_by_completed(True)] == [first.id]
+        assert [t.id for t in repository.filter_by_completed(False)] == [second.id]
+        
+        repository.update(first.id, completed=False)
+        repository.delete(second.id)
+        assert repository.filter_by_completed(True) == []
+        assert [t.id for t in repository.filter_by_completed(False)] == [first.id]
+    
+    def test_sorted_index_matches_sorted_list(self, monkeypatch):
+        monkeypatch.setattr(SortedIndex, 'BUCKET_SIZE', 4)
+        rng = random.Random(0)
+        index = SortedIndex()
+        expected = set()
+        for _ in range(2000):
+            key = rng.randint(0, 200)
+            if rng.random() < 0.6 and key not in expected:
+                index.add(key)
+                expected.add(key)
+            else:
+                index.remove(key)
+                expected.discard(key)
+            probe = rng.randint(-5, 205)
+            assert list(index.iter_from()) == sorted(expected)
+            assert list(index.iter_from(probe, exclusive=True)) == sorted(k for k in expected if k > probe)
+
+
+def without_timestamps(tasks):
+    return [task.to_dict(('id', 'title', 'description', 'completed')) for task in tasks]
+
+
+class TestSQLiteTaskRepository:
+    @pytest.mark.parametrize('seed', range(3))
+    def test_matches_memory_repository_after_random_operations(self, tmp_path, seed):
+        rng = random.Random(seed)
+        memory = TaskRepository()
+        sqlite = SQLiteTaskRepository(str(tmp_path / 'tasks.db'))
+        for _ in range(300):
+            ids = [t.id for t in memory]
+            operation = rng.choice(['create', 'create', 'update', 'delete']) if ids else 'create'
+            if operation == 'create':
+                title = rng.choice(['Alpha', 'alpha', 'Beta', 'ÄBC', 'Straße']) + str(rng.randint(0, 9))
+                assert memory.create(title).id == sqlite.create(title).id
+            elif operation == 'update':
+                task_id = rng.choice(ids)
+                completed = rng.choice([True, False, 1, 0])
+                assert without_timestamps([memory.update(task_id, completed=completed)]) == \
+                    without_timestamps([sqlite.update(task_id, completed=completed)])
+            else:
+                task_id = rng.choice(ids + [999999])
+                assert memory.delete(task_id) == sqlite.delete(task_id)
+
+            assert memory.counts() == sqlite.counts()
+            for completed in (None, True, False):
+                for prefix in ('', 'a', 'STRASSE'):
+                    after = None
+                    while True:
+                        expected, expected_after = memory.page_by_title(prefix, 7, after, completed)
+                        actual, after = sqlite.page_by_title(prefix, 7, after, completed)
+                        assert without_timestamps(actual) == without_timestamps(expected)
+                        assert after == expected_after
+                        if after is None:
+                            break
+                expected, _ = memory.page(1000, None, completed)
+                actual, _ = sqlite.page(1000, None, completed)
+                assert without_timestamps(actual) == without_timestamps(expected)
+
+    def test_cache_is_invalidated_by_writes_from_another_worker(self, tmp_path):
+        path = str(tmp_path / 'tasks.db')
+        worker_a = SQLiteTaskRepository(path)
+        worker_b = SQLiteTaskRepository(path)
+        task = worker_a.create('Task 1')
+        
+        assert worker_a.get(task.id).completed is False
+        assert len(worker_a.cache) == 1
+        
+        worker_b.update(task.id, completed=True)
+        assert worker_a.get(task.id).completed is True
+        
+        worker_b.delete(task.id)
+        assert worker_a.get(task.id) is None
+        assert worker_a.counts()['total'] == 0
+    
+    def test_own_writes_keep_unrelated_cache_entries(self, tmp_path):
+        repository = SQLiteTaskRepository(str(tmp_path / 'tasks.db'))
+        first = repository.create('Task 1')
+        second = repository.create('Task 2')
+        repository.get(first.id)
+        repository.get(second.id)
+        
+        repository.update(second.id, title='Task 2b')
+        assert repository.cache.get(first.id) is not None
+        assert repository.cache.get(second.id) is None
+        assert repository.get(second.id).title == 'Task 2b'
+    
+    def test_request_counter_is_shared_between_workers(self, tmp_path):
+        path = str(tmp_path / 'tasks.db')
+        worker_a = SQLiteTaskRepository(path, request_flush_interval=60)
+        worker_b = SQLiteTaskRepository(path, request_flush_interval=60)
+        
+        for _ in range(3):
+            worker_a.count_request()
+        worker_b.count_request()
+        assert worker_a.requests_served() == 3
+        
+        worker_a.flush_requests()
+        worker_b.flush_requests()
+        assert worker_a.requests_served() == worker_b.requests_served() == 4
+        assert worker_b.count_request() == 5
+    
+    def test_request_counter_is_written_in_batches(self, tmp_path):
+        path = str(tmp_path / 'tasks.db')
+        worker = SQLiteTaskRepository(path, request_flush_every=10, request_flush_interval=60)
+        observer = SQLiteTaskRepository(path)
+        
+        for _ in range(25):
+            worker.count_request()
+        assert observer.requests_served() == 20
+        assert worker.requests_served() == 25
+    
+    def test_rolled_back_transaction_leaves_no_trace(self, tmp_path):
+        repository = SQLiteTaskRepository(str(tmp_path / 'tasks.db'))
+        task = repository.create('Task 1')
+        with pytest.raises(RuntimeError):
+            with repository.transaction():
+                repository.update(task.id, completed=True)
+                assert repository.get(task.id).completed is True
+                repository.create('Task 2')
+                raise RuntimeError('abort')
+        
+        assert repository.get(task.id).completed is False
+        assert repository.counts() == {'total': 1, 'completed': 0, 'pending': 1}
+        assert repository.create('Task 2').id == 2
 
 
 class TestErrors: